@@ -10,27 +10,40 @@ from vcorelib.args.newline import add_newline_arg
 
 # internal
 from datazen import DEFAULT_MANIFEST
+from datazen.enums import HashPolicy, LoadPool
 from datazen.environment.integrated import from_manifest
+from datazen.parsing import hash_policy
 
 
 def entry(args: argparse.Namespace) -> int:
     """Execute the requested task."""
 
     result = 0
-    env = from_manifest(args.manifest, newline=args.line_ending)
-    if env.get_valid():
-        # clean, if requested
-        if args.sync:
-            env.write_cache()
-        if args.clean:
-            env.clean_cache()
-        elif args.describe:
-            env.describe_cache()
-        else:
-            # execute targets
-            result = int(not env.execute_targets(args.targets))
-    else:
-        result = 1
+    with hash_policy(HashPolicy(args.hash_policy)):
+        env = from_manifest(
+            args.manifest,
+            newline=args.line_ending,
+            load_workers=args.load_workers,
+            load_pool=args.load_pool,
+        )
+        try:
+            if env.get_valid():
+                # clean, if requested
+                if args.sync:
+                    env.write_cache()
+                if args.clean:
+                    env.clean_cache()
+                elif args.describe:
+                    env.describe_cache()
+                else:
+                    # execute targets
+                    result = int(
+                        not env.execute_targets(args.targets, args.jobs)
+                    )
+            else:
+                result = 1
+        finally:
+            env.shutdown_load_processes()
     return result
 
 
@@ -59,6 +72,42 @@ def add_app_args(parser: argparse.ArgumentParser) -> None:
             + "execution"
         ),
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "number of independent tasks to execute in parallel "
+            + "(default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        help=(
+            "number of workers to decode data files with "
+            + "(default: the manifest's 'load_workers' setting)"
+        ),
+    )
+    parser.add_argument(
+        "--load-pool",
+        choices=[x.value for x in LoadPool],
+        help=(
+            "kind of workers to decode data files with "
+            + "(default: the manifest's 'load_pool' setting)"
+        ),
+    )
+    parser.add_argument(
+        "--hash-policy",
+        choices=[x.value for x in HashPolicy],
+        default=HashPolicy.STRICT.value,
+        help=(
+            "how to detect file changes, 'trust-stat' skips hashing files "
+            + "whose modification time, size and inode are unchanged "
+            + "(default: '%(default)s')"
+        ),
+    )
     parser.add_argument(
         "-d",
         "--describe",
@@ -0,0 +1,280 @@
+"""
+datazen - Classes for storing cache data on disk.
+"""
+
+# built-in
+import abc
+from contextlib import closing
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+# third-party
+from vcorelib.dict import GenericStrDict
+from vcorelib.io import ARBITER
+
+# internal
+from datazen.compile import write_dir
+from datazen.enums import CacheStorage
+
+LOG = logging.getLogger(__name__)
+SQLITE_NAME = "cache.sqlite"
+
+# a cache row is addressed by its top-level key and second-level key
+RowKey = Tuple[str, str]
+
+
+def encode_value(value: Any) -> str:
+    """Serialize a cache value (deterministically)."""
+
+    return json.dumps(value, separators=(",", ":"), sort_keys=True)
+
+
+def value_digest(encoded: str) -> str:
+    """Compute a digest of a serialized cache value."""
+
+    return hashlib.md5(encoded.encode("utf-8")).hexdigest()
+
+
+def iter_rows(
+    data: GenericStrDict, logger: logging.Logger = LOG
+) -> Iterator[Tuple[RowKey, Any]]:
+    """
+    Iterate over cache data as addressable rows, sections that aren't
+    dictionaries (e.g. from malformed files) are skipped.
+    """
+
+    for section, values in data.items():
+        if not isinstance(values, dict):
+            logger.warning("cache section '%s' isn't a dictionary", section)
+            continue
+        for key, value in values.items():
+            yield (section, key), value
+
+
+class CacheBackend(abc.ABC):
+    """
+    A storage location for cache data (a dictionary of dictionaries) that
+    only commits the values that changed since the data was last loaded or
+    written.
+    """
+
+    def __init__(self, cache_dir: str, logger: logging.Logger = LOG) -> None:
+        """Construct a backend for a cache directory."""
+
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.lock = threading.RLock()
+        self.digests: Dict[RowKey, str] = {}
+
+    @staticmethod
+    def create(
+        cache_dir: str,
+        storage: CacheStorage = CacheStorage.JSON,
+        logger: logging.Logger = LOG,
+    ) -> "CacheBackend":
+        """Create a backend for a cache directory and storage format."""
+
+        if storage is CacheStorage.SQLITE:
+            return SqliteCacheBackend(cache_dir, logger)
+        return JsonCacheBackend(cache_dir, logger)
+
+    def load(self) -> GenericStrDict:
+        """Read all cache data from disk."""
+
+        with self.lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            rows = self.read_rows()
+
+            result: GenericStrDict = {}
+            self.digests = {}
+            for (section, key), encoded in rows.items():
+                result.setdefault(section, {})[key] = json.loads(encoded)
+                self.digests[(section, key)] = value_digest(encoded)
+            return result
+
+    def write(self, data: GenericStrDict) -> int:
+        """
+        Commit cache data to disk, return the number of rows that needed to
+        be updated (or removed).
+        """
+
+        with self.lock:
+            updates: Dict[RowKey, str] = {}
+            digests: Dict[RowKey, str] = {}
+            for row, value in iter_rows(data, self.logger):
+                encoded = encode_value(value)
+                digests[row] = value_digest(encoded)
+                if self.digests.get(row) != digests[row]:
+                    updates[row] = encoded
+            removed = set(self.digests) - set(digests)
+
+            if updates or removed:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.write_rows(data, updates, removed)
+            self.digests = digests
+
+            return len(updates) + len(removed)
+
+    def clean(self) -> None:
+        """Remove all cache data from disk."""
+
+        with self.lock:
+            if os.path.isdir(self.cache_dir):
+                shutil.rmtree(self.cache_dir)
+            self.digests = {}
+
+    @abc.abstractmethod
+    def read_rows(self) -> Dict[RowKey, str]:
+        """Read all (serialized) rows from disk."""
+
+    @abc.abstractmethod
+    def write_rows(
+        self,
+        data: GenericStrDict,
+        updates: Dict[RowKey, str],
+        removed: Set[RowKey],
+    ) -> None:
+        """Commit updated (serialized) rows to disk and remove stale ones."""
+
+
+class JsonCacheBackend(CacheBackend):
+    """Cache data stored as one JSON file per top-level key."""
+
+    def files(self) -> List[str]:
+        """Get the paths to all of the JSON files in the cache directory."""
+
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in sorted(os.listdir(self.cache_dir))
+            if name.endswith(".json")
+            and os.path.isfile(os.path.join(self.cache_dir, name))
+        ]
+
+    def read_rows(self) -> Dict[RowKey, str]:
+        """Read all (serialized) rows from disk."""
+
+        result: Dict[RowKey, str] = {}
+        for path in self.files():
+            section = os.path.basename(path)[: -len(".json")]
+            data = ARBITER.decode(path, self.logger)
+            if not data.success:
+                self.logger.warning("couldn't load cache file '%s'", path)
+                continue
+            for row, value in iter_rows({section: data.data}, self.logger):
+                result[row] = encode_value(value)
+
+        return result
+
+    def write_rows(
+        self,
+        data: GenericStrDict,
+        updates: Dict[RowKey, str],
+        removed: Set[RowKey],
+    ) -> None:
+        """Commit updated (serialized) rows to disk and remove stale ones."""
+
+        # the smallest unit that can be written is a whole file
+        sections = {x[0] for x in updates} | {x[0] for x in removed}
+        write_dir(
+            self.cache_dir,
+            {x: data[x] for x in sections if x in data},
+            "json",
+            indent=None,
+        )
+
+        for section in sections - set(data):
+            path = os.path.join(self.cache_dir, f"{section}.json")
+            if os.path.isfile(path):
+                os.remove(path)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Cache data stored in a single SQLite database (with write-ahead logging,
+    so readers aren't blocked by a writer), one row per second-level key.
+    """
+
+    def __init__(self, cache_dir: str, logger: logging.Logger = LOG) -> None:
+        """Construct a backend for a cache directory."""
+
+        super().__init__(cache_dir, logger)
+        self.path = os.path.join(self.cache_dir, SQLITE_NAME)
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the database (creating it if necessary)."""
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (section, key))"
+        )
+        return conn
+
+    def migrate(self) -> Dict[RowKey, str]:
+        """Import (and remove) cache data stored by the JSON backend."""
+
+        legacy = JsonCacheBackend(self.cache_dir, self.logger)
+        files = legacy.files()
+        if not files:
+            return {}
+
+        rows = legacy.read_rows()
+        self.write_rows({}, rows, set())
+        for path in files:
+            os.remove(path)
+
+        self.logger.info(
+            "migrated %d file(s) in '%s' to '%s'",
+            len(files),
+            self.cache_dir,
+            SQLITE_NAME,
+        )
+        return rows
+
+    def read_rows(self) -> Dict[RowKey, str]:
+        """Read all (serialized) rows from disk."""
+
+        if not os.path.isfile(self.path):
+            return self.migrate()
+
+        with closing(self.connect()) as conn:
+            return {
+                (section, key): value
+                for section, key, value in conn.execute(
+                    "SELECT section, key, value FROM cache"
+                )
+            }
+
+    def write_rows(
+        self,
+        data: GenericStrDict,
+        updates: Dict[RowKey, str],
+        removed: Set[RowKey],
+    ) -> None:
+        """Commit updated (serialized) rows to disk and remove stale ones."""
+
+        # every row is addressed individually, the full data isn't needed
+        del data
+
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.executemany(
+                    "DELETE FROM cache WHERE section = ? AND key = ?",
+                    removed,
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (section, key, value) "
+                    "VALUES (?, ?, ?)",
+                    ((x[0], x[1], value) for x, value in updates.items()),
+                )
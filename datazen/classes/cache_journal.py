@@ -0,0 +1,82 @@
+"""
+datazen - A class for appending incremental cache updates to a log file.
+"""
+
+# built-in
+import json
+import logging
+import os
+import threading
+from typing import Iterator
+
+# third-party
+from vcorelib.dict import GenericStrDict
+
+LOG = logging.getLogger(__name__)
+JOURNAL_SUFFIX = ".journal"
+
+
+class CacheJournal:
+    """
+    An append-only log of cache updates. Records are written (and flushed to
+    disk) one line at a time so that work completed before a crash can be
+    recovered by replaying the journal on top of the last cache snapshot.
+    """
+
+    def __init__(
+        self, path: str, fsync: bool = True, logger: logging.Logger = LOG
+    ) -> None:
+        """Construct a journal backed by a file at the provided path."""
+
+        self.path = path
+        self.fsync = fsync
+        self.logger = logger
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def for_cache(cache_dir: str, fsync: bool = True) -> "CacheJournal":
+        """Create a journal that sits next to a cache directory."""
+
+        return CacheJournal(f"{cache_dir}{JOURNAL_SUFFIX}", fsync)
+
+    def append(self, record: GenericStrDict) -> None:
+        """Append a single record to the journal."""
+
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as stream:
+                stream.write(line + "\n")
+                stream.flush()
+                if self.fsync:
+                    os.fsync(stream.fileno())
+
+    def replay(self) -> Iterator[GenericStrDict]:
+        """
+        Iterate over every complete record in the journal. A partially
+        written record (e.g. from an interrupted process) ends the replay.
+        """
+
+        if not os.path.isfile(self.path):
+            return
+
+        with self.lock:
+            with open(self.path, encoding="utf-8") as stream:
+                lines = stream.readlines()
+
+        for idx, line in enumerate(lines):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                self.logger.warning(
+                    "discarding %d incomplete record(s) from '%s'",
+                    len(lines) - idx,
+                    self.path,
+                )
+                return
+
+    def clear(self) -> None:
+        """Remove all records from the journal."""
+
+        with self.lock:
+            if os.path.isfile(self.path):
+                os.remove(self.path)
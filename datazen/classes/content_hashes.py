@@ -0,0 +1,62 @@
+"""
+datazen - A class for memoizing file-content hashes.
+"""
+
+# built-in
+import threading
+from typing import Dict, Iterable, Tuple
+
+# third-party
+from vcorelib.paths import file_md5_hex
+
+ContentKey = Tuple[str, Tuple[int, ...]]
+
+
+class ContentHashes:
+    """
+    A table of file-content hashes keyed by path and file identity
+    (modification time, size and inode), so that a file is only read and
+    hashed once for as long as its identity doesn't change.
+    """
+
+    def __init__(self) -> None:
+        """Construct an empty hash table."""
+
+        self.data: Dict[ContentKey, str] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, stat: Iterable[int]) -> str:
+        """Get the hash of a file's contents, hashing it on a miss."""
+
+        key = (path, tuple(stat))
+        with self.lock:
+            result = self.data.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+
+        result = file_md5_hex(path)
+        with self.lock:
+            self.misses += 1
+            self.data[key] = result
+        return result
+
+    def clear(self) -> None:
+        """Forget all hashes and reset counters."""
+
+        with self.lock:
+            self.data = {}
+            self.hits = 0
+            self.misses = 0
+
+    def describe(self) -> str:
+        """Describe the state of this table."""
+
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return (
+            f"{len(self.data)} file(s) hashed, {self.hits} hit(s), "
+            f"{self.misses} miss(es) ({rate:.1f}% hit rate)"
+        )
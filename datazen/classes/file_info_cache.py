@@ -7,9 +7,8 @@ from collections import defaultdict
 from copy import deepcopy
 import logging
 import os
-import shutil
 import time
-from typing import Dict, List, cast
+from typing import Dict, List, Optional, Set, cast
 
 # third-party
 from vcorelib.dict import GenericStrDict
@@ -17,15 +16,18 @@ from vcorelib.paths import rel
 
 # internal
 from datazen import VERSION
-from datazen.compile import write_dir
-from datazen.load import LoadedFiles, load_dir_only
+from datazen.classes.cache_backend import CacheBackend
+from datazen.classes.cache_journal import CacheJournal
+from datazen.classes.indexed_list import IndexedList
+from datazen.enums import CacheStorage
+from datazen.load import LoadedFiles
 from datazen.parsing import dedup_dict_lists, set_file_hash
 
 LOG = logging.getLogger(__name__)
 
 DATA_DEFAULT = {
     "hashes": defaultdict(lambda: defaultdict(dict)),
-    "loaded": defaultdict(list),
+    "loaded": defaultdict(IndexedList),
     "meta": {"version": VERSION},
 }
 
@@ -37,30 +39,113 @@ class FileInfoCache:
         self,
         cache_dir: str = None,
         logger: logging.Logger = LOG,
+        storage: CacheStorage = CacheStorage.JSON,
     ) -> None:
         """Construct an empty cache or optionally load from a directory."""
 
         self.data: GenericStrDict = deepcopy(DATA_DEFAULT)
         self.removed_data: Dict[str, List[str]] = defaultdict(list)
-        self.cache_dir: str = ""
-        if cache_dir is not None:
-            self.load(cache_dir)
         self.logger = logger
+        self.backend: Optional[CacheBackend] = None
+
+        # state for journaling updates made since the last snapshot
+        self.journal: Optional[CacheJournal] = None
+        self.journaled: Dict[str, int] = {}
+        self.dirty: Dict[str, Set[str]] = defaultdict(set)
 
-    def load(self, cache_dir: str) -> None:
+        if cache_dir is not None:
+            self.load(cache_dir, storage)
+
+    def load(
+        self, cache_dir: str, storage: CacheStorage = CacheStorage.JSON
+    ) -> None:
         """Load data from a directory."""
 
-        assert self.cache_dir == ""
-        self.cache_dir = cache_dir
-        os.makedirs(self.cache_dir, exist_ok=True)
+        assert self.backend is None
+        self.backend = CacheBackend.create(cache_dir, storage, self.logger)
 
         # reject things that don't belong by updating instead of assigning
         new_data = sync_cache_data(
-            load_dir_only(self.cache_dir, True)[0], self.removed_data
+            defaultdict(dict, self.backend.load()), self.removed_data
         )
         for key in DATA_DEFAULT:
             self.data[key].update(new_data[key])
 
+        # recover any updates that weren't written to the snapshot
+        self.journal = CacheJournal.for_cache(self.cache_dir)
+        replayed = 0
+        for record in self.journal.replay():
+            self.apply(record)
+            replayed += 1
+        if replayed:
+            self.logger.info(
+                "recovered %d update(s) from '%s'",
+                replayed,
+                self.journal.path,
+            )
+        self.mark_journaled()
+
+    @property
+    def cache_dir(self) -> str:
+        """The directory this cache is stored in (if any)."""
+
+        return self.backend.cache_dir if self.backend is not None else ""
+
+    def mark_journaled(self) -> None:
+        """Consider all current data as already journaled."""
+
+        self.journaled = {
+            key: len(value) for key, value in self.data["loaded"].items()
+        }
+        self.dirty = defaultdict(set)
+
+    def delta(self) -> GenericStrDict:
+        """
+        Collect (and consume) the updates made to this cache since it was
+        last journaled.
+        """
+
+        result: GenericStrDict = {"hashes": {}, "loaded": {}}
+
+        for key, loaded in self.data["loaded"].items():
+            new = loaded[self.journaled.get(key, 0) :]
+            self.journaled[key] = len(loaded)
+            if new:
+                result["loaded"][key] = list(new)
+            self.dirty[key].update(new)
+
+        for key, paths in self.dirty.items():
+            hashes = self.get_hashes(key)
+            updates = {x: hashes[x] for x in paths if x in hashes}
+            if updates:
+                result["hashes"][key] = updates
+        self.dirty = defaultdict(set)
+
+        return result
+
+    def journal_updates(self) -> bool:
+        """
+        Append any updates made since the last journal entry to the journal,
+        return whether or not there were any.
+        """
+
+        if self.journal is None:
+            return False
+
+        record = self.delta()
+        has_updates = bool(record["hashes"] or record["loaded"])
+        if has_updates:
+            self.journal.append(record)
+        return has_updates
+
+    def apply(self, record: GenericStrDict) -> None:
+        """Promote updates from a journal record into this cache."""
+
+        update = FileInfoCache()
+        update.data["hashes"].update(record.get("hashes", {}))
+        update.data["loaded"].update(record.get("loaded", {}))
+        meld(self, update)
+
     def get_hashes(self, sub_dir: str) -> GenericStrDict:
         """Get the cached, dictionary of file hashes for a certain key."""
 
@@ -76,6 +161,8 @@ class FileInfoCache:
         abs_path = os.path.abspath(path)
         is_new = set_file_hash(self.get_hashes(sub_dir), abs_path, also_cache)
         if also_cache and is_new:
+            self.dirty[sub_dir].add(abs_path)
+
             # guard against a failure in the "new" detection
             loaded_data = self.get_loaded(sub_dir)
             if abs_path not in loaded_data:
@@ -83,10 +170,14 @@ class FileInfoCache:
 
         return not is_new
 
-    def get_loaded(self, sub_dir: str) -> List[str]:
+    def get_loaded(self, sub_dir: str) -> IndexedList:
         """Get the cached, list of loaded files for a certain key."""
 
-        return cast(List[str], self.data["loaded"][sub_dir])
+        # index lists that were assigned (e.g. from loading data) directly
+        loaded = self.data["loaded"]
+        if not isinstance(loaded[sub_dir], IndexedList):
+            loaded[sub_dir] = IndexedList(loaded[sub_dir])
+        return cast(IndexedList, loaded[sub_dir])
 
     def describe(self) -> None:
         """Describe this cache's contents for debugging purposes."""
@@ -141,17 +232,27 @@ class FileInfoCache:
         """Remove cached data from the file-system."""
 
         self.data = deepcopy(DATA_DEFAULT)
-        if self.cache_dir != "":
-            shutil.rmtree(self.cache_dir)
+        self.mark_journaled()
+        if self.journal is not None:
+            self.journal.clear()
+        if self.backend is not None:
+            self.backend.clean()
             self.logger.info("cleaning cache at '%s'", self.cache_dir)
 
-    def write(self, out_type: str = "json") -> None:
+    def write(self) -> None:
         """Commit cached data to the file-system."""
 
-        if self.cache_dir != "":
+        if self.backend is not None:
             data = sync_cache_data(self.data, self.removed_data)
-            write_dir(self.cache_dir, data, out_type, indent=None)
-            self.logger.debug("wrote cache to '%s'", self.cache_dir)
+            self.logger.debug(
+                "wrote cache to '%s' (%d update(s))",
+                self.cache_dir,
+                self.backend.write(data),
+            )
+
+            # the snapshot now contains everything that was journaled
+            if self.journal is not None:
+                self.journal.clear()
 
 
 def copy(cache: FileInfoCache) -> FileInfoCache:
@@ -160,9 +261,11 @@ def copy(cache: FileInfoCache) -> FileInfoCache:
     new_cache = FileInfoCache()
 
     # copy the cache
-    new_cache.cache_dir = cache.cache_dir
+    new_cache.backend = cache.backend
     new_cache.data = deepcopy(cache.data)
     new_cache.removed_data = deepcopy(cache.removed_data)
+    new_cache.journal = cache.journal
+    new_cache.mark_journaled()
 
     return new_cache
 
@@ -171,15 +274,11 @@ def meld(cache_a: FileInfoCache, cache_b: FileInfoCache) -> None:
     """Promote all updates from cache_b into cache_a."""
 
     # aggregates new files
-    a_load = cache_a.data["loaded"]
-    b_load = cache_b.data["loaded"]
-    for key in b_load:
-        if key not in a_load:
-            a_load[key] = b_load[key]
-        else:
-            for item in b_load[key]:
-                if item not in a_load[key]:
-                    a_load[key].append(item)
+    for key in cache_b.data["loaded"]:
+        a_loaded = cache_a.get_loaded(key)
+        for item in cache_b.get_loaded(key):
+            if item not in a_loaded:
+                a_loaded.append(item)
 
     # update hash data
     a_hash = cache_a.data["hashes"]
@@ -192,14 +291,21 @@ def meld(cache_a: FileInfoCache, cache_b: FileInfoCache) -> None:
                 if item not in a_hash[key]:
                     a_hash[key][item] = b_hash[key][item]
                 else:
-                    a_data = a_hash[key][item]
-                    b_data = b_hash[key][item]
-                    if (
-                        b_data["hash"] != a_data["hash"]
-                        and b_data["time"] > a_data["time"]
-                    ):
-                        a_data["hash"] = b_data["hash"]
-                        a_data["time"] = b_data["time"]
+                    meld_hash_data(a_hash[key][item], b_hash[key][item])
+
+
+def meld_hash_data(a_data: GenericStrDict, b_data: GenericStrDict) -> None:
+    """Promote newer hash data (for a single file) into existing data."""
+
+    if b_data["hash"] != a_data["hash"] and b_data["time"] > a_data["time"]:
+        a_data["hash"] = b_data["hash"]
+        a_data["time"] = b_data["time"]
+        if "stat" in b_data:
+            a_data["stat"] = b_data["stat"]
+
+    # keep the most recently observed file identity
+    elif b_data["hash"] == a_data["hash"] and "stat" in b_data:
+        a_data["stat"] = b_data["stat"]
 
 
 def time_str(time_s: float) -> str:
@@ -216,21 +322,14 @@ def cmp_loaded_count(
     between two caches.
     """
 
-    a_loaded = cache_a.get_loaded(name)
-    b_loaded = cache_b.get_loaded(name)
-
-    # get counts of all the files from both caches
-    count_data: GenericStrDict = defaultdict(lambda: {"a": 0, "b": 0})
-    for item in a_loaded:
-        count_data[item]["a"] = a_loaded.count(item)
-    for item in b_loaded:
-        count_data[item]["b"] = b_loaded.count(item)
+    a_counts = cache_a.get_loaded(name).counts
+    b_counts = cache_b.get_loaded(name).counts
 
-    # accumulated the differences in counts
-    result = 0
-    for data in count_data.values():
-        result += abs(data["a"] - data["b"])
-    return result
+    # accumulate the differences in counts of all the files from both caches
+    return sum(
+        abs(a_counts[item] - b_counts[item])
+        for item in a_counts.keys() | b_counts.keys()
+    )
 
 
 def cmp_loaded_count_from_set(
@@ -0,0 +1,106 @@
+"""
+datazen - A list that keeps an index of how many times each item appears.
+"""
+
+# built-in
+from collections import Counter
+from typing import Any, Iterable, List, SupportsIndex
+
+
+class IndexedList(List[Any]):
+    """
+    An ordered multiset. Membership tests and counts are answered from an
+    index (kept in sync with every mutation) instead of by scanning the list,
+    while the data itself still serializes as a plain list.
+    """
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        """Construct a list (and its index) from an iterable of items."""
+
+        super().__init__(items)
+        self.counts: Counter[Any] = Counter(self)
+
+    def __reduce__(self):
+        """Rebuild the index (instead of copying it) on copy or pickle."""
+
+        return (self.__class__, (list(self),))
+
+    def __contains__(self, item: Any) -> bool:
+        """Determine if an item is in this list."""
+
+        return self.counts[item] > 0
+
+    def count(self, item: Any) -> int:
+        """Get the number of times an item appears in this list."""
+
+        return self.counts[item]
+
+    def append(self, item: Any) -> None:
+        """Add an item to the end of this list."""
+
+        super().append(item)
+        self.counts[item] += 1
+
+    def extend(self, items: Iterable[Any]) -> None:
+        """Add items to the end of this list."""
+
+        items = list(items)
+        super().extend(items)
+        self.counts.update(items)
+
+    def __iadd__(self, items: Iterable[Any]):  # type: ignore[misc]
+        """Add items to the end of this list."""
+
+        self.extend(items)
+        return self
+
+    def __imul__(self, value: SupportsIndex):
+        """Repeat the contents of this list in place."""
+
+        super().__imul__(value)
+        self.counts = Counter(self)
+        return self
+
+    def insert(self, index: SupportsIndex, item: Any) -> None:
+        """Add an item at a specific position in this list."""
+
+        super().insert(index, item)
+        self.counts[item] += 1
+
+    def remove(self, item: Any) -> None:
+        """Remove the first occurrence of an item from this list."""
+
+        super().remove(item)
+        self.forget(item)
+
+    def pop(self, index: SupportsIndex = -1) -> Any:
+        """Remove (and return) an item at a specific position."""
+
+        item = super().pop(index)
+        self.forget(item)
+        return item
+
+    def clear(self) -> None:
+        """Remove all items from this list."""
+
+        super().clear()
+        self.counts.clear()
+
+    def __setitem__(self, index, value) -> None:
+        """Replace an item (or a slice of items) in this list."""
+
+        super().__setitem__(index, value)
+        self.counts = Counter(self)
+
+    def __delitem__(self, index) -> None:
+        """Remove an item (or a slice of items) from this list."""
+
+        super().__delitem__(index)
+        self.counts = Counter(self)
+
+    def forget(self, item: Any) -> None:
+        """Remove a single occurrence of an item from the index."""
+
+        self.counts[item] -= 1
+        if self.counts[item] <= 0:
+            del self.counts[item]
@@ -0,0 +1,115 @@
+"""
+datazen - A class for loading templates only when they're first used.
+"""
+
+# built-in
+import threading
+from typing import Dict, Iterator, Mapping, MutableMapping, Tuple
+
+# third-party
+import jinja2
+
+# a template that hasn't been loaded yet, the environment to load it with and
+# its name within that environment
+TemplateSource = Tuple[jinja2.Environment, str]
+
+
+class LazyTemplates(MutableMapping[str, jinja2.Template]):
+    """
+    A mapping of keys to templates, where templates that were discovered
+    (but not used yet) are only compiled when they're first accessed.
+    """
+
+    def __init__(
+        self, templates: Mapping[str, jinja2.Template] = None
+    ) -> None:
+        """Construct a mapping from (optional) already-loaded templates."""
+
+        self.sources: Dict[str, TemplateSource] = {}
+        self.loaded: Dict[str, jinja2.Template] = {}
+        self.lock = threading.RLock()
+        if templates is not None:
+            self.update(templates)
+
+    def add(self, key: str, env: jinja2.Environment, name: str) -> None:
+        """Add a template that will be loaded (from an environment) later."""
+
+        with self.lock:
+            self.loaded.pop(key, None)
+            self.sources[key] = (env, name)
+
+    def __getitem__(self, key: str) -> jinja2.Template:
+        """Get a template, load it if it hasn't been loaded yet."""
+
+        with self.lock:
+            if key not in self.loaded:
+                env, name = self.sources[key]
+                self.loaded[key] = env.get_template(name)
+                del self.sources[key]
+            return self.loaded[key]
+
+    def source(self, key: str) -> TemplateSource:
+        """
+        Get the environment (and name within it) for a template, without
+        loading it.
+        """
+
+        with self.lock:
+            if key in self.sources:
+                return self.sources[key]
+            template = self.loaded[key]
+        assert template.name is not None
+        return template.environment, template.name
+
+    def __setitem__(self, key: str, value: jinja2.Template) -> None:
+        """Set a (loaded) template."""
+
+        with self.lock:
+            self.sources.pop(key, None)
+            self.loaded[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a template."""
+
+        with self.lock:
+            if key in self.loaded:
+                del self.loaded[key]
+            else:
+                del self.sources[key]
+
+    def __contains__(self, key: object) -> bool:
+        """Determine if a template is present (without loading it)."""
+
+        return key in self.loaded or key in self.sources
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over template keys."""
+
+        with self.lock:
+            keys = list(self.loaded) + list(self.sources)
+        return iter(keys)
+
+    def __len__(self) -> int:
+        """Get the number of templates."""
+
+        return len(self.loaded) + len(self.sources)
+
+    def update(self, other=(), /, **kwargs) -> None:
+        """Update this mapping without loading templates from another one."""
+
+        if isinstance(other, LazyTemplates):
+            with self.lock, other.lock:
+                for key, source in other.sources.items():
+                    self.add(key, *source)
+                for key, template in other.loaded.items():
+                    self[key] = template
+            other = ()
+
+        super().update(other, **kwargs)
+
+    def __copy__(self) -> "LazyTemplates":
+        """Create a (shallow) copy of this mapping."""
+
+        result = LazyTemplates()
+        result.update(self)
+        return result
@@ -0,0 +1,121 @@
+"""
+datazen - A class for re-using directory listings that haven't changed.
+"""
+
+# built-in
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple
+
+LOG = logging.getLogger(__name__)
+LISTING_CACHE_FILE = "listings.json"
+
+# listings of directories modified more recently than this (in nanoseconds)
+# aren't cached, further changes might not update the modification time
+RACY_NS = 2 * 10**9
+
+
+class Listing(NamedTuple):
+    """The entries of a directory."""
+
+    dirs: List[str]
+    files: List[str]
+
+    # directories that are symbolic links (listed, but not walked)
+    links: List[str]
+
+
+def scan_dir(path: str) -> Listing:
+    """List the entries of a directory."""
+
+    result = Listing([], [], [])
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                result.dirs.append(entry.name)
+                if entry.is_symlink():
+                    result.links.append(entry.name)
+            else:
+                result.files.append(entry.name)
+
+    return result
+
+
+class ListingCache:
+    """
+    Directory listings, keyed by path and stored with the modification time
+    of the directory they were taken from. Adding, removing or renaming
+    entries updates a directory's modification time, so unchanged
+    directories don't need to be listed again.
+    """
+
+    def __init__(self, path: str = None, logger: logging.Logger = LOG) -> None:
+        """Construct a cache, optionally backed by a file."""
+
+        self.path = path
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.data: Dict[str, List[Any]] = {}
+        self.changed = False
+        self.hits = 0
+        self.misses = 0
+
+        if path is not None and os.path.isfile(path):
+            try:
+                with open(path, encoding="utf-8") as stream:
+                    self.data = json.load(stream)
+            except (OSError, ValueError) as exc:
+                self.logger.warning("couldn't read '%s': %s", path, exc)
+
+    def list(self, path: str) -> Listing:
+        """List the entries of a directory (if they might have changed)."""
+
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            entry = self.data.get(path)
+            if entry is not None and entry[0] == mtime:
+                self.hits += 1
+                return Listing(*entry[1:])
+            self.misses += 1
+
+        result = scan_dir(path)
+        if time.time_ns() - mtime >= RACY_NS:
+            with self.lock:
+                self.data[path] = [mtime, *result]
+                self.changed = True
+
+        return result
+
+    def write(self) -> None:
+        """Commit listings to the file-system (if any were updated)."""
+
+        with self.lock:
+            if self.path is None or not self.changed:
+                return
+
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as stream:
+                    json.dump(self.data, stream)
+                os.replace(path, self.path)
+                self.changed = False
+            except OSError as exc:
+                self.logger.warning("couldn't write '%s': %s", self.path, exc)
+                if os.path.isfile(path):
+                    os.remove(path)
+
+    def describe(self) -> str:
+        """Describe the state of this cache."""
+
+        return f"{self.hits} hit(s), {self.misses} miss(es)"
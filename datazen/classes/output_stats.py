@@ -0,0 +1,62 @@
+"""
+datazen - A class for counting the output files that tasks produce.
+"""
+
+# built-in
+import threading
+from typing import Dict, Tuple
+
+
+class OutputStats:
+    """
+    Counts of the output files that were written, and the output files that
+    weren't written because their contents wouldn't have changed.
+    """
+
+    def __init__(self) -> None:
+        """Construct empty counts."""
+
+        self.lock = threading.Lock()
+        self.written = 0
+        self.written_bytes = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+
+        # the size of each target's encoded output and the time (in
+        # nanoseconds) spent encoding it
+        self.encoded: Dict[str, Tuple[int, int]] = {}
+
+    def record(self, size: int, written: bool) -> None:
+        """Count an output file (of some size)."""
+
+        with self.lock:
+            if written:
+                self.written += 1
+                self.written_bytes += size
+            else:
+                self.skipped += 1
+                self.skipped_bytes += size
+
+    def record_encode(self, name: str, size: int, time_ns: int) -> None:
+        """Record the size of a target's output and how long it took."""
+
+        with self.lock:
+            self.encoded[name] = (size, time_ns)
+
+    def throughput(self, name: str) -> float:
+        """
+        Get the rate (in bytes per second) that a target's output was encoded
+        at (or zero if it isn't known).
+        """
+
+        size, time_ns = self.encoded.get(name, (0, 0))
+        return size * 1e9 / time_ns if time_ns > 0 else 0.0
+
+    def describe(self) -> str:
+        """Describe these counts."""
+
+        return (
+            f"{self.written} output(s) written ({self.written_bytes} bytes), "
+            f"{self.skipped} unchanged output(s) skipped "
+            f"({self.skipped_bytes} bytes)"
+        )
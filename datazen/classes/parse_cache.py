@@ -0,0 +1,117 @@
+"""
+datazen - A class for storing decoded file data on disk.
+"""
+
+# built-in
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+LOG = logging.getLogger(__name__)
+PARSE_CACHE_DIR = "parse"
+
+
+class ParseCache:
+    """
+    Storage for the data decoded from files, stored with the hash of a
+    file's contents (and the variables it was rendered with) so that
+    unchanged files don't need to be rendered or decoded again. Entries are
+    keyed by file, so they're replaced when their inputs change (instead of
+    accumulating).
+    """
+
+    def __init__(self, cache_dir: str, logger: logging.Logger = LOG) -> None:
+        """Construct a cache backed by a directory."""
+
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(file_hash: str, variables_hash: str, is_template: bool) -> str:
+        """Create a key for decoded file data."""
+
+        return hashlib.md5(
+            f"{file_hash}:{variables_hash}:{int(is_template)}".encode("utf-8")
+        ).hexdigest()
+
+    def path(self, key: str) -> str:
+        """Get the path to the file that stores data for a key."""
+
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+
+    def read(self, key: str) -> Optional[Any]:
+        """Read decoded data for a key, if it's present."""
+
+        result = None
+        try:
+            with open(self.path(key), "rb") as stream:
+                result = pickle.load(stream)
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, pickle.UnpicklingError) as exc:
+            self.logger.warning("couldn't read '%s': %s", self.path(key), exc)
+
+        return result
+
+    def get(
+        self, key: str, valid: Callable[[Any], bool] = None
+    ) -> Optional[Any]:
+        """
+        Get decoded data from the cache, if it's present (and valid, if a
+        validity check is provided).
+        """
+
+        return self.find([key], valid)
+
+    def find(
+        self, keys: Iterable[str], valid: Callable[[Any], bool] = None
+    ) -> Optional[Any]:
+        """
+        Get decoded data from the cache for the first of some candidate keys
+        that's present (and valid, if a validity check is provided).
+        """
+
+        result = None
+        for key in keys:
+            result = self.read(key)
+            if result is not None and valid is not None and not valid(result):
+                result = None
+            if result is not None:
+                break
+
+        with self.lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return result
+
+    def set(self, key: str, data: Any) -> None:
+        """Store decoded data in the cache."""
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # write to a temporary file first so that readers never observe a
+        # partially-written entry
+        fd, path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as stream:
+                pickle.dump(data, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path, self.path(key))
+        except (OSError, TypeError, pickle.PicklingError) as exc:
+            self.logger.warning("couldn't write '%s': %s", self.path(key), exc)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def describe(self) -> str:
+        """Describe the state of this cache."""
+
+        return f"{self.hits} hit(s), {self.misses} miss(es)"
@@ -0,0 +1,55 @@
+"""
+datazen - A class for sharing worker processes between loads.
+"""
+
+# built-in
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+from typing import Optional
+
+
+class ProcessPool:
+    """
+    A pool of worker processes that's only started when it's first used, so
+    that every load can share it (instead of each starting interpreters).
+    """
+
+    def __init__(self, workers: int) -> None:
+        """Construct a pool of some number of worker processes."""
+
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.starts = 0
+
+    def get(self) -> ProcessPoolExecutor:
+        """Get the executor for this pool, start it if necessary."""
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self.starts += 1
+            return self.executor
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (if they were started)."""
+
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self) -> "ProcessPool":
+        """Use this pool in a context."""
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Stop the worker processes when the context ends."""
+
+        self.shutdown()
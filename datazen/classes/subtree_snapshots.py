@@ -0,0 +1,167 @@
+"""
+datazen - A class for re-using the data loaded from unchanged directories.
+"""
+
+# built-in
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple, cast
+
+# third-party
+from vcorelib.dict import GenericStrDict
+
+# internal
+from datazen.classes.parse_cache import ParseCache
+
+# the path components of a directory, relative to the root of a tree
+Parts = Tuple[str, ...]
+
+
+def within(parts: Parts, root: Parts) -> bool:
+    """Determine if a directory is (or is inside of) another directory."""
+
+    return parts[: len(root)] == root
+
+
+class SubtreeSnapshots:
+    """
+    Snapshots of the data loaded from directory trees, stored with a digest
+    of each directory's subtree (the hashes of its files and the digests of
+    its sub-directories, in the order they're loaded). Only one snapshot is
+    kept for each directory, it's replaced when the subtree changes.
+    Snapshots are only taken from (and restored into) directories whose data
+    starts out empty, so restoring one has the same result as loading the
+    subtree again.
+    """
+
+    def __init__(
+        self, parse_cache: ParseCache, salt: str = "", name: str = ""
+    ) -> None:
+        """
+        Construct snapshots stored in a cache, the salt should capture
+        anything (other than file contents) that loaded data depends on and
+        the name should identify the tree (and how it's loaded).
+        """
+
+        self.parse_cache = parse_cache
+        self.salt = salt
+        self.name = name
+        self.digests: Dict[Parts, str] = {}
+        self.probed: Dict[Parts, GenericStrDict] = {}
+
+        # subtrees being loaded (and the number of errors before they were)
+        # and the subtree that's being restored
+        self.pending: List[Tuple[Parts, int]] = []
+        self.restored: Optional[Parts] = None
+
+    def key(self, parts: Parts) -> str:
+        """Get the cache key for a directory's snapshot."""
+
+        return ParseCache.key(self.name, "subtree:" + "/".join(parts), False)
+
+    def lookup(self, parts: Parts) -> Optional[GenericStrDict]:
+        """Get a directory's snapshot, if its subtree hasn't changed."""
+
+        entry = self.parse_cache.get(self.key(parts))
+        if (
+            isinstance(entry, list)
+            and len(entry) == 2
+            and entry[0] == self.digests[parts]
+        ):
+            return cast(GenericStrDict, entry[1])
+        return None
+
+    def add_digests(
+        self, directories: List[Tuple[Parts, List[Tuple[str, str]]]]
+    ) -> None:
+        """
+        Compute digests for directories (their path components and the name
+        and digest of each file) in the (top-down) order they're walked.
+        """
+
+        children: Dict[Parts, List[str]] = {}
+
+        # sub-directories are always walked after their parent
+        for parts, files in reversed(directories):
+            digest = hashlib.md5(self.salt.encode("utf-8"))
+            for name, file_digest in files:
+                digest.update(f"f:{name}:{file_digest};".encode("utf-8"))
+            for entry in reversed(children.pop(parts, [])):
+                digest.update(entry.encode("utf-8"))
+
+            self.digests[parts] = digest.hexdigest()
+            if parts:
+                children.setdefault(parts[:-1], []).append(
+                    f"d:{parts[-1]}:{self.digests[parts]};"
+                )
+
+    def probe(self, directories: Iterable[Parts]) -> Set[Parts]:
+        """
+        Find the directories with snapshots (top-down), return the
+        directories whose files are likely not to need loading.
+        """
+
+        result: Set[Parts] = set()
+        found: Optional[Parts] = None
+        for parts in directories:
+            if found is not None and within(parts, found):
+                result.add(parts)
+                continue
+
+            data = self.lookup(parts)
+            if data is not None:
+                self.probed[parts] = data
+                found = parts
+                result.add(parts)
+
+        return result
+
+    def skipped(self, parts: Parts) -> bool:
+        """Determine if a directory's data was restored from a snapshot."""
+
+        return self.restored is not None and within(parts, self.restored)
+
+    def restore(self, parts: Parts, data: GenericStrDict) -> bool:
+        """
+        Attempt to restore a directory's (empty) data from a snapshot, return
+        whether or not it was.
+        """
+
+        self.restored = None
+        if not isinstance(data, dict) or data:
+            return False
+
+        snapshot = self.probed.pop(parts, None)
+        if snapshot is None:
+            snapshot = self.lookup(parts)
+        if snapshot is None:
+            return False
+
+        data.update(snapshot)
+        self.restored = parts
+        return True
+
+    def begin(self, parts: Parts, data: GenericStrDict, errors: int) -> None:
+        """Start loading a directory (and take a snapshot once it's done)."""
+
+        if isinstance(data, dict) and not data:
+            self.pending.append((parts, errors))
+
+    def finish(
+        self,
+        parts: Optional[Parts],
+        cursors: Dict[Parts, GenericStrDict],
+        errors: int,
+    ) -> None:
+        """
+        Take snapshots of the subtrees that were loaded (without errors)
+        before a directory (or all of them, if no directory is provided).
+        """
+
+        while self.pending and (
+            parts is None or not within(parts, self.pending[-1][0])
+        ):
+            root, errors_before = self.pending.pop()
+            if errors == errors_before:
+                self.parse_cache.set(
+                    self.key(root), [self.digests[root], cursors[root]]
+                )
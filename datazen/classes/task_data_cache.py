@@ -4,15 +4,23 @@ datazen - A class for storing data from completed operations to disk.
 
 # built-in
 from collections import defaultdict
-import os
-import shutil
+from typing import Dict, Iterable
 
 # third-party
 from vcorelib.dict import GenericStrDict
 
 # internal
-from datazen.compile import write_dir
-from datazen.load import load_dir_only
+from datazen.classes.cache_backend import CacheBackend
+from datazen.classes.cache_journal import CacheJournal
+from datazen.enums import CacheStorage
+from datazen.parsing import data_md5
+
+# task data is stored by task variant, these (reserved) variants store the
+# digests of dependency data that each task last consumed, the hashes of
+# each task's input files and the data that traced renders accessed
+CONSUMED_KEY = "__consumed__"
+INPUTS_KEY = "__inputs__"
+TRACED_KEY = "__traced__"
 
 
 class TaskDataCache:
@@ -21,27 +29,97 @@ class TaskDataCache:
     (and more correct) short-circuiting.
     """
 
-    def __init__(self, cache_dir: str):
+    def __init__(
+        self, cache_dir: str, storage: CacheStorage = CacheStorage.JSON
+    ):
         """Construct an empty cache or optionally load from a directory."""
 
         self.data: GenericStrDict = defaultdict(lambda: defaultdict(dict))
         self.cache_dir = cache_dir
-        self.load(self.cache_dir)
+        self.backend = CacheBackend.create(self.cache_dir, storage)
+        self.journal = CacheJournal.for_cache(self.cache_dir)
+        self.load()
+
+        # digests of the data produced by resolved tasks, and the input files
+        # (with hashes) of tasks that haven't been resolved yet (by task slug)
+        self.digests: Dict[str, str] = {}
+        self.pending_inputs: Dict[str, Dict[str, str]] = {}
 
-    def load(self, load_dir: str) -> None:
+    def load(self) -> None:
         """Read new data from the cache directory and update state."""
 
-        os.makedirs(load_dir, exist_ok=True)
-        self.data.update(load_dir_only(load_dir, are_templates=False)[0])
+        for variant, data in self.backend.load().items():
+            self.data[variant].update(data)
+
+        # recover task data that wasn't written to the snapshot
+        for record in self.journal.replay():
+            self.data[record["variant"]][record["name"]] = record["data"]
+
+    def record(self, variant: str, name: str) -> None:
+        """Journal the data for a single task."""
+
+        if name in self.data[variant]:
+            self.journal.append(
+                {
+                    "variant": variant,
+                    "name": name,
+                    "data": self.data[variant][name],
+                }
+            )
+
+    def resolve(self, variant: str, name: str, slug: str) -> None:
+        """
+        Compute the digest of a resolved task's data and record its (pending)
+        input files.
+        """
+
+        self.digests[slug] = data_md5(self.data[variant].get(name))
+        if slug in self.pending_inputs:
+            self.data[INPUTS_KEY][slug] = self.pending_inputs.pop(slug)
+
+    def output_changed(self, dep_slug: str, slug: str) -> bool:
+        """
+        Determine if the data produced by a (resolved) dependency differs
+        from the data that a task consumed the last time it was resolved.
+        """
+
+        digest = self.digests.get(dep_slug)
+        return (
+            digest is None
+            or self.data[CONSUMED_KEY].get(slug, {}).get(dep_slug) != digest
+        )
+
+    def consume(self, slug: str, dep_slugs: Iterable[str]) -> None:
+        """Record the digests of dependency data that a task consumed."""
+
+        self.data[CONSUMED_KEY][slug] = {
+            x: self.digests[x] for x in dep_slugs if x in self.digests
+        }
+
+    def changed_inputs(self, slug: str, inputs: Dict[str, str]) -> int:
+        """
+        Count the input files of a task that were added, removed or changed
+        since the task was last resolved. The new inputs are recorded when
+        the task is resolved.
+        """
+
+        self.pending_inputs[slug] = inputs
+        previous = self.data[INPUTS_KEY].get(slug, {})
+        return sum(
+            previous.get(path) != inputs.get(path)
+            for path in previous.keys() | inputs.keys()
+        )
 
-    def save(self, out_type: str = "json") -> None:
+    def save(self) -> None:
         """Write cache data to disk."""
 
-        write_dir(self.cache_dir, self.data, out_type, indent=None)
+        self.backend.write(self.data)
+        self.journal.clear()
 
     def clean(self, purge_data: bool = True) -> None:
         """Clean this cache's data on disk."""
 
-        shutil.rmtree(self.cache_dir)
+        self.backend.clean()
+        self.journal.clear()
         if purge_data:
             self.data = defaultdict(lambda: defaultdict(dict))
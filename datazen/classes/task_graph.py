@@ -0,0 +1,155 @@
+"""
+datazen - A class for scheduling tasks based on their dependencies.
+"""
+
+# built-in
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# internal
+from datazen.environment.base import Task, TaskResult
+
+LOG = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Task], TaskResult]
+
+
+class TaskGraph:
+    """
+    A directed graph of tasks (and the tasks they depend on) that can execute
+    every task whose dependencies have been satisfied on a pool of workers.
+    """
+
+    def __init__(self, logger: logging.Logger = LOG) -> None:
+        """Construct an empty task graph."""
+
+        self.dependencies: Dict[Task, Set[Task]] = {}
+        self.dependents: Dict[Task, Set[Task]] = defaultdict(set)
+        self.results: Dict[Task, TaskResult] = {}
+        self.logger = logger
+
+    def add(self, task: Task, deps: Iterable[Task] = None) -> None:
+        """Add a task (and the tasks it depends on) to the graph."""
+
+        if deps is None:
+            deps = []
+
+        task_deps = self.dependencies.setdefault(task, set())
+        for dep in deps:
+            # tasks can't depend on themselves
+            if dep != task:
+                task_deps.add(dep)
+                self.dependents[dep].add(task)
+                self.dependencies.setdefault(dep, set())
+
+    @staticmethod
+    def build(
+        root: Task,
+        get_deps: Callable[[Task], List[Task]],
+        logger: logging.Logger = LOG,
+    ) -> "TaskGraph":
+        """
+        Build a graph of every task required to satisfy a root task, using a
+        function that provides the direct dependencies of a task.
+        """
+
+        graph = TaskGraph(logger)
+        visited: Set[Task] = set()
+        to_visit = [root]
+        while to_visit:
+            task = to_visit.pop()
+            if task in visited:
+                continue
+            visited.add(task)
+
+            deps = get_deps(task)
+            graph.add(task, deps)
+            to_visit.extend(x for x in deps if x not in visited)
+
+        return graph
+
+    def cycle(self) -> Optional[List[Task]]:
+        """Find a dependency cycle in the graph, if there is one."""
+
+        visiting: Set[Task] = set()
+        visited: Set[Task] = set()
+
+        def visit(task: Task, path: List[Task]) -> Optional[List[Task]]:
+            """Depth-first search for a back edge."""
+
+            if task in visiting:
+                return path[path.index(task) :] + [task]
+            if task in visited:
+                return None
+
+            visiting.add(task)
+            path.append(task)
+            for dep in self.dependencies[task]:
+                result = visit(dep, path)
+                if result is not None:
+                    return result
+            path.pop()
+            visiting.remove(task)
+            visited.add(task)
+            return None
+
+        for task in self.dependencies:
+            result = visit(task, [])
+            if result is not None:
+                return result
+
+        return None
+
+    def execute(self, handle: TaskHandler, jobs: int = 1) -> bool:
+        """
+        Execute every task in the graph (dependencies first) with a bounded
+        number of workers. Stop scheduling new tasks after any task fails.
+        """
+
+        cycle = self.cycle()
+        if cycle is not None:
+            self.logger.error(
+                "dependency cycle detected: %s",
+                " -> ".join(x.slug for x in cycle),
+            )
+            return False
+
+        remaining = {
+            task: len(deps) for task, deps in self.dependencies.items()
+        }
+        success = True
+
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+            running: Dict[Future[TaskResult], Task] = {
+                pool.submit(handle, task): task
+                for task, count in remaining.items()
+                if count == 0
+            }
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    result = future.result()
+                    self.results[task] = result
+
+                    if not result.success:
+                        success = False
+
+                    # don't start anything new once a task has failed
+                    if not success:
+                        continue
+
+                    for dependent in self.dependents[task]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            running[pool.submit(handle, dependent)] = dependent
+
+        return success
@@ -0,0 +1,70 @@
+"""
+datazen - Classes for re-using compiled Jinja templates.
+"""
+
+# built-in
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+
+# third-party
+import jinja2
+
+BYTECODE_CACHE_DIR = "bytecode"
+
+
+class BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    A file-system bytecode cache that creates its directory when it's first
+    written to.
+    """
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        """Write the bytecode for a template to the cache."""
+
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+class TemplateCache:
+    """
+    Compiled templates for data files, keyed by the hash of their source so
+    that identical content is only compiled once (and, with a bytecode
+    cache, only once across runs).
+    """
+
+    def __init__(self, bytecode_cache: jinja2.BytecodeCache = None) -> None:
+        """Construct an empty cache of templates."""
+
+        self.sources: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+        # use the same options that 'jinja2.Template' would, but don't bound
+        # the number of templates that can be cached
+        self.environment = jinja2.Environment(
+            loader=jinja2.FunctionLoader(self.source),
+            bytecode_cache=bytecode_cache,
+            cache_size=-1,
+            auto_reload=False,
+        )
+
+    def source(self, name: str) -> Optional[str]:
+        """Get the source for a template."""
+
+        with self.lock:
+            return self.sources.get(name)
+
+    def get(self, source: str) -> jinja2.Template:
+        """Get a compiled template for some template source."""
+
+        key = hashlib.md5(source.encode("utf-8")).hexdigest()
+        with self.lock:
+            self.sources[key] = source
+        return self.environment.get_template(key)
+
+
+def has_template_syntax(source: str) -> bool:
+    """Determine if some text contains any (default) Jinja delimiters."""
+
+    return "{{" in source or "{%" in source or "{#" in source
@@ -0,0 +1,137 @@
+"""
+datazen - A class for recording which parts of some data are accessed.
+"""
+
+# built-in
+from typing import Any, Dict, Iterator, List, Mapping, Tuple
+
+# third-party
+from vcorelib.dict import GenericStrDict
+
+# internal
+from datazen import GLOBAL_KEY
+from datazen.parsing import data_md5
+
+# a sequence of keys leading to a value in (nested) data
+KeyPath = Tuple[Any, ...]
+
+# digests of the values (by key path) that were accessed
+Accesses = Dict[KeyPath, str]
+
+# the digest recorded for keys that weren't present
+MISSING = ""
+
+# the types of values that are recorded (other values aren't data)
+PLAIN_TYPES = (dict, list, tuple, str, int, float, bool, type(None))
+
+
+class TracedData(Mapping[Any, Any]):
+    """
+    A read-only view of a dictionary that records the values that are
+    accessed through it. Nested dictionaries are also traced.
+    """
+
+    def __init__(
+        self, data: GenericStrDict, path: KeyPath, accesses: Accesses
+    ) -> None:
+        """Construct a view of some data (at a key path)."""
+
+        # avoid attribute names that could shadow keys during template
+        # attribute lookups
+        self._traced_data = data
+        self._traced_path = path
+        self._traced_accesses = accesses
+
+    def _traced_record(self, path: KeyPath, value: Any) -> None:
+        """Record the digest of a value that was accessed."""
+
+        if path not in self._traced_accesses:
+            self._traced_accesses[path] = data_md5(value)
+
+    def __getitem__(self, key: Any) -> Any:
+        """Get a value (and record that it was accessed)."""
+
+        path = self._traced_path + (key,)
+        if key not in self._traced_data:
+            self._traced_accesses.setdefault(path, MISSING)
+            raise KeyError(key)
+
+        value = self._traced_data[key]
+        if isinstance(value, dict):
+            return TracedData(value, path, self._traced_accesses)
+        if isinstance(value, PLAIN_TYPES):
+            self._traced_record(path, value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over keys (the entire dictionary is accessed)."""
+
+        self._traced_record(self._traced_path, self._traced_data)
+        return iter(self._traced_data)
+
+    def __len__(self) -> int:
+        """Get the number of keys (the entire dictionary is accessed)."""
+
+        self._traced_record(self._traced_path, self._traced_data)
+        return len(self._traced_data)
+
+    def __repr__(self) -> str:
+        """Represent the underlying data (which is then accessed)."""
+
+        self._traced_record(self._traced_path, self._traced_data)
+        return repr(self._traced_data)
+
+
+def trace_context(data: GenericStrDict, accesses: Accesses) -> GenericStrDict:
+    """
+    Create a (template) render context from some data that records accesses.
+    Top-level values are looked up directly by templates, so non-dictionary
+    values at the top level are always considered accessed.
+    """
+
+    result: GenericStrDict = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            result[key] = TracedData(value, (key,), accesses)
+        else:
+            result[key] = value
+            if isinstance(value, PLAIN_TYPES):
+                accesses.setdefault((key,), data_md5(value))
+
+    # add a (traced) self-reference key for convenience
+    result.setdefault(GLOBAL_KEY, TracedData(data, (), accesses))
+    return result
+
+
+def traced_values(records: List[Any], data: GenericStrDict) -> List[str]:
+    """
+    Get the digests of the values in some data at the key paths of some
+    (previously recorded) accesses.
+    """
+
+    absent = object()
+
+    result = []
+    for path, _ in records:
+        value: Any = data
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                value = absent
+                break
+            value = value[key]
+
+        result.append(MISSING if value is absent else data_md5(value))
+
+    return result
+
+
+def traced_changes(records: List[Any], data: GenericStrDict) -> int:
+    """
+    Count the number of (previously recorded) accesses whose values are
+    different in some data.
+    """
+
+    return sum(
+        int(digest != record[1])
+        for digest, record in zip(traced_values(records, data), records)
+    )
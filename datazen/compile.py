@@ -3,11 +3,11 @@ datazen - An interface for turning a dictionary into various serialized forms.
 """
 
 # built-in
-from io import StringIO
+from io import StringIO, TextIOWrapper
 import logging
 import os
 from pathlib import Path
-from typing import Tuple
+from typing import BinaryIO, Tuple
 
 # third-party
 from vcorelib.dict import GenericStrDict
@@ -16,6 +16,8 @@ from vcorelib.paths import Pathlike, normalize
 
 # internal
 from datazen import DEFAULT_TYPE
+from datazen.classes.output_stats import OutputStats
+from datazen.output import write_with
 
 LOG = logging.getLogger(__name__)
 
@@ -51,6 +53,44 @@ def str_compile(
     return ""
 
 
+def file_compile(
+    configs: GenericStrDict,
+    data_type: str,
+    path: str,
+    mode: str = "w",
+    if_changed: bool = False,
+    stats: OutputStats = None,
+    logger: logging.Logger = LOG,
+    **kwargs,
+) -> Tuple[bool, int, int]:
+    """
+    Serialize dictionary data directly into an output file (without building
+    the serialized string in memory first). Return whether or not the file was
+    written, the size of the encoded data and the time (in nanoseconds) spent
+    encoding it.
+    """
+
+    size = 0
+    time_ns = -1
+
+    def writer(stream: BinaryIO) -> None:
+        """Encode data to the output file's stream."""
+
+        nonlocal size, time_ns
+        start = stream.tell()
+        ostream = TextIOWrapper(stream, encoding="utf-8")
+        try:
+            time_ns = ARBITER.encode_stream(
+                data_type, ostream, configs, logger, **kwargs
+            )[1]
+        finally:
+            ostream.detach()
+        size = stream.tell() - start
+
+    written = write_with(path, writer, mode, if_changed, stats)
+    return written, size, time_ns
+
+
 def get_compile_output(
     entry: GenericStrDict, default_type: str = DEFAULT_TYPE
 ) -> Tuple[str, str]:
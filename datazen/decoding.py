@@ -0,0 +1,285 @@
+"""
+datazen - APIs for decoding data files in worker processes.
+"""
+
+# built-in
+import logging
+from logging.handlers import BufferingHandler
+import marshal
+import os
+import pickle
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# third-party
+from vcorelib.dict import GenericStrDict
+from vcorelib.io.types import LoadResult
+
+# internal
+from datazen.classes.parse_cache import ParseCache
+from datazen.classes.template_cache import BytecodeCache, TemplateCache
+from datazen.classes.traced_data import (
+    Accesses,
+    trace_context,
+    traced_changes,
+)
+from datazen.parsing import data_md5
+from datazen.parsing import decode as decode_raw
+from datazen.parsing import file_hash
+
+# a message logged while decoding: the logger's name, the level and the
+# (formatted) message
+LogMessage = Tuple[str, int, str]
+
+# the caches used by a worker process, by the directories they're stored in
+Caches = Tuple[Optional[ParseCache], Optional[TemplateCache]]
+CACHES: Dict[Tuple[Optional[str], Optional[str]], Caches] = {}
+CACHES_LOCK = threading.Lock()
+
+# serialized results are prefixed with the format they're serialized with
+MARSHAL = b"m"
+PICKLE = b"p"
+
+
+def pack_results(
+    results: List[LoadResult], messages: List[LogMessage]
+) -> bytes:
+    """
+    Serialize decoded data (and messages logged while decoding it). Plain
+    data is serialized with 'marshal' (which is much faster), anything else
+    falls back to 'pickle'.
+    """
+
+    payload = ([tuple(x) for x in results], messages)
+    try:
+        return MARSHAL + marshal.dumps(payload)
+    except ValueError:
+        return PICKLE + pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def unpack_results(data: bytes) -> List[LoadResult]:
+    """
+    De-serialize decoded data, messages logged while decoding it are logged
+    again (in order) from this process.
+    """
+
+    results, messages = (
+        marshal.loads(data[1:])
+        if data[:1] == MARSHAL
+        else pickle.loads(data[1:])
+    )
+
+    for name, level, message in messages:
+        logging.getLogger(name).log(level, "%s", message)
+
+    return [LoadResult(*x) for x in results]
+
+
+def traced_key(path: str, is_template: bool = True) -> str:
+    """
+    Get the key that the variables accessed while rendering a file (the last
+    time it was rendered) and the data decoded from it are cached with.
+    """
+
+    return ParseCache.key(os.path.abspath(path), "traced", is_template)
+
+
+def traced_entry(
+    path: str, parse_cache: ParseCache, is_template: bool = True
+) -> Optional[Tuple[List[Any], Any]]:
+    """
+    Get the variables accessed while rendering a file (and the data decoded
+    from it), if the file hasn't changed since.
+    """
+
+    content_hash = file_hash(path)
+    entry = parse_cache.get(
+        traced_key(path, is_template),
+        lambda x: isinstance(x, list) and len(x) == 3 and x[0] == content_hash,
+    )
+    return (entry[1], entry[2]) if entry is not None else None
+
+
+def traced_fingerprint(
+    path: str,
+    variables: GenericStrDict,
+    parse_cache: ParseCache,
+    is_template: bool = True,
+    variables_hash: str = None,
+) -> str:
+    """
+    Get a digest of the variables that a file's data depends on: the
+    variables that were accessed when it was last rendered, or all of them
+    if that isn't known. Accesses are only a digest of the data if none of
+    the accessed values changed (otherwise rendering again could access
+    different data).
+    """
+
+    if not variables or not is_template:
+        return ""
+
+    entry = traced_entry(path, parse_cache, is_template)
+    if entry is None or traced_changes(entry[0], variables):
+        return "all:" + (
+            variables_hash
+            if variables_hash is not None
+            else data_md5(variables)
+        )
+
+    # the recorded digests are the values' (and include the key paths)
+    return f"some:{data_md5(entry[0])}"
+
+
+def decode_traced(
+    path: str,
+    variables: GenericStrDict,
+    parse_cache: ParseCache,
+    is_template: bool = True,
+    template_cache: TemplateCache = None,
+    variables_hash: str = None,
+) -> LoadResult:
+    """
+    Decode (and pre-process) a file, re-using the data decoded from it
+    previously if none of the variables it accessed have changed. The
+    variables a file accesses are recorded when it's rendered.
+    """
+
+    entry = traced_entry(path, parse_cache, is_template)
+    if entry is not None and not traced_changes(entry[0], variables):
+        return LoadResult(entry[1], True)
+
+    accesses: Accesses = {}
+    try:
+        result = decode_raw(
+            path,
+            variables,
+            is_template,
+            template_cache=template_cache,
+            context=lambda x: trace_context(x, accesses),
+        )
+
+    # some filters (e.g. 'tojson') only accept plain dictionaries, such
+    # files are rendered (every time) without recording accesses
+    except TypeError:
+        return decode_raw(
+            path,
+            variables,
+            is_template,
+            template_cache=template_cache,
+            variables_hash=variables_hash,
+        )
+
+    # accesses and data are stored together (and replace what was stored
+    # for the file previously)
+    if result.success:
+        parse_cache.set(
+            traced_key(path, is_template),
+            [
+                file_hash(path),
+                [[list(key), value] for key, value in accesses.items()],
+                result.data,
+            ],
+        )
+
+    return result
+
+
+def decode_file(
+    path: str,
+    variables: GenericStrDict,
+    is_template: bool = True,
+    parse_cache: ParseCache = None,
+    template_cache: TemplateCache = None,
+    trace: bool = False,
+    variables_hash: str = None,
+) -> LoadResult:
+    """
+    Decode (and pre-process) a file, optionally re-using data based on the
+    variables it accessed (instead of all of them).
+    """
+
+    if trace and parse_cache is not None:
+        return decode_traced(
+            path,
+            variables,
+            parse_cache,
+            is_template,
+            template_cache,
+            variables_hash,
+        )
+
+    return decode_raw(
+        path,
+        variables,
+        is_template,
+        parse_cache=parse_cache,
+        template_cache=template_cache,
+        variables_hash=variables_hash,
+    )
+
+
+def process_caches(
+    parse_dir: Optional[str], bytecode_dir: Optional[str]
+) -> Caches:
+    """Get the caches that a worker process decodes files with."""
+
+    key = (parse_dir, bytecode_dir)
+    with CACHES_LOCK:
+        if key not in CACHES:
+            CACHES[key] = (
+                ParseCache(parse_dir) if parse_dir is not None else None,
+                (
+                    TemplateCache(BytecodeCache(bytecode_dir))
+                    if bytecode_dir is not None
+                    else None
+                ),
+            )
+        return CACHES[key]
+
+
+def decode_chunk(
+    paths: List[str],
+    variables: List[GenericStrDict],
+    is_template: bool = True,
+    parse_dir: str = None,
+    bytecode_dir: str = None,
+    trace: bool = False,
+    variables_hashes: List[Optional[str]] = None,
+) -> bytes:
+    """
+    Decode (and pre-process) some files in a worker process, return the
+    serialized results.
+    """
+
+    if variables_hashes is None:
+        variables_hashes = [None for _ in paths]
+
+    parse_cache, template_cache = process_caches(parse_dir, bytecode_dir)
+
+    # capture what's logged so that the parent process can report it
+    handler = BufferingHandler(sys.maxsize)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        results = [
+            decode_file(
+                path,
+                path_variables,
+                is_template,
+                parse_cache,
+                template_cache,
+                trace,
+                variables_hash,
+            )
+            for path, path_variables, variables_hash in zip(
+                paths, variables, variables_hashes
+            )
+        ]
+    finally:
+        root.removeHandler(handler)
+
+    return pack_results(
+        results,
+        [(x.name, x.levelno, x.getMessage()) for x in handler.buffer],
+    )
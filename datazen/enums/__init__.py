@@ -14,3 +14,38 @@ class DataType(Enum):
     SCHEMA_TYPES = "schema_type"
     TEMPLATE = "template"
     VARIABLE = "variable"
+
+
+class HashPolicy(Enum):
+    """Strategies for determining whether or not a file has changed."""
+
+    # always hash file contents
+    STRICT = "strict"
+
+    # skip hashing when a file's modification time, size and inode all match
+    # the values recorded alongside its last-known hash
+    TRUST_STAT = "trust-stat"
+
+
+class CacheStorage(Enum):
+    """The formats that cache data can be stored on disk with."""
+
+    # a directory of JSON files (one per top-level key)
+    JSON = "json"
+
+    # a single SQLite database (one row per second-level key)
+    SQLITE = "sqlite"
+
+
+class LoadPool(Enum):
+    """The kinds of worker pools that data files can be decoded with."""
+
+    # processes for trees with a lot of data, threads otherwise
+    AUTO = "auto"
+
+    # threads (decoding pure-Python formats is bound by the interpreter lock)
+    THREAD = "thread"
+
+    # processes (which need to be started, and exchange data with the
+    # parent in serialized form)
+    PROCESS = "process"
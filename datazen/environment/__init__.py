@@ -3,7 +3,7 @@ datazen - A data structure for runtime data.
 """
 
 # built-in
-from copy import copy, deepcopy
+from copy import copy
 import logging
 import os
 import threading
@@ -33,10 +33,10 @@ class EnvironmentNamespace:
             self.data[dtype] = {}
 
         self.data_clone_strategy: Dict[DataType, GenericStrDict] = {
-            DataType.CONFIG: {"should": True, "method": deepcopy},
-            DataType.SCHEMA: {"should": True, "method": deepcopy},
+            DataType.CONFIG: {"should": True, "method": copy},
+            DataType.SCHEMA: {"should": True, "method": copy},
             DataType.SCHEMA_TYPES: {"should": False},
-            DataType.VARIABLE: {"should": True, "method": deepcopy},
+            DataType.VARIABLE: {"should": True, "method": copy},
             DataType.TEMPLATE: {"should": True, "method": copy},
         }
 
@@ -172,11 +172,18 @@ class EnvironmentNamespace:
 def clone(
     env: EnvironmentNamespace, update: EnvironmentNamespace
 ) -> EnvironmentNamespace:
-    """Create a clone (deep copy) of an existing Environment."""
+    """
+    Create a clone of an existing Environment. Loaded data is only copied at
+    the top level, nested data is shared with the original (and must not be
+    modified in place).
+    """
 
     with env.lock:
         # all we need to do is copy all of the attributes
-        update.directories = deepcopy(env.directories)
+        update.directories = {
+            dtype: [dict(x) for x in dirs]
+            for dtype, dirs in env.directories.items()
+        }
 
         # clone data based on the source's strategy
         for dtype, strat in env.data_clone_strategy.items():
@@ -186,3 +193,22 @@ def clone(
         update.valid = env.valid
 
     return update
+
+
+def copy_for_merge(
+    data: GenericStrDict, update: GenericStrDict
+) -> GenericStrDict:
+    """
+    Copy the parts of some (shared) data that merging another dictionary
+    into it would modify in place, the rest of the data is shared with the
+    original.
+    """
+
+    result = dict(data)
+    for key, value in update.items():
+        if key in result:
+            if isinstance(result[key], dict) and isinstance(value, dict):
+                result[key] = copy_for_merge(result[key], value)
+            elif isinstance(result[key], list):
+                result[key] = list(result[key])
+    return result
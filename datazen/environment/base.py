@@ -3,11 +3,10 @@ datazen - A base class to be extended for runtime data loading and storing.
 """
 
 # built-in
-from collections import defaultdict
 import logging
 import os
 import threading
-from typing import List, NamedTuple
+from typing import Dict, List, NamedTuple, Tuple
 
 # third-party
 from vcorelib.dict import GenericStrDict
@@ -18,9 +17,33 @@ from vcorelib.paths import Pathlike
 from datazen import ROOT_NAMESPACE
 from datazen.enums import DataType
 from datazen.environment import EnvironmentNamespace, clone
+from datazen.paths import resolve_dir
 
 SLUG_DELIM = "-"
 
+# the kinds of directories each type of target can load
+SCHEMA_DEPS = ["schemas", "schema_types"]
+LOAD_DEPS: Dict[str, List[str]] = {
+    "compiles": ["configs", "variables"] + SCHEMA_DEPS,
+    "renders": ["templates"],
+}
+
+# the (resolved) directories, by kind, that a target loads
+NamespaceSignature = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+def namespace_signature(target_data: GenericStrDict) -> NamespaceSignature:
+    """
+    Create a signature for the directories that a target loads, targets with
+    the same signature load the same data.
+    """
+
+    result = []
+    for key in ["configs", "templates", "variables"] + SCHEMA_DEPS:
+        paths = [resolve_dir(str(x)) for x in target_data.get(key, [])]
+        result.append((key, tuple(dict.fromkeys(paths))))
+    return tuple(result)
+
 
 class Task(NamedTuple):
     """Parameters identifying a task."""
@@ -99,6 +122,8 @@ class BaseEnvironment:
 
         self.namespaces = {}
         self.namespaces[default_ns] = EnvironmentNamespace(default_ns)
+        self.namespace_signatures: Dict[NamespaceSignature, str] = {}
+        self.namespaces_shared = 0
         self.lock = threading.RLock()
         self.logger = logger
         self.newline = newline
@@ -184,24 +209,37 @@ class BaseEnvironment:
     ) -> str:
         """
         Determine the namespace that a target should use, in general they
-        all should be unique unless they don't load anything new.
+        all should be unique unless they don't load anything new (or they
+        load the exact same data as another target).
         """
 
-        load_deps = defaultdict(list)
-        schema_deps = ["schemas", "schema_types"]
-        load_deps["compiles"] = ["configs", "variables"] + schema_deps
-        load_deps["renders"] = ["templates"]
-
         # add a unique namespace for this target if it loads
         # any new data as to not load any of this data upstream,
         # but still cache it (edge cases here?)
-        load_dep_list = load_deps[key_name]
+        load_dep_list = LOAD_DEPS.get(key_name, [])
         for load_dep in load_dep_list:
             if load_dep in target_data:
-                namespace = Task(key_name, target).slug
-                self.add_namespace(namespace)
+                # re-use the namespace of a target that loads the same
+                # directories
+                signature = namespace_signature(target_data)
+                with self.lock:
+                    namespace = self.namespace_signatures.get(signature, "")
+                    if namespace:
+                        self.namespaces_shared += 1
+                    else:
+                        namespace = Task(key_name, target).slug
+                        self.add_namespace(namespace)
+                        self.namespace_signatures[signature] = namespace
                 return namespace
 
         # don't make a new namespace if we don't load
         # new data
         return ROOT_NAMESPACE
+
+    def describe_namespaces(self) -> str:
+        """Describe how namespaces have been created (and re-used)."""
+
+        return (
+            f"{len(self.namespaces)} namespace(s), "
+            f"{self.namespaces_shared} re-used"
+        )
@@ -11,10 +11,12 @@ from vcorelib.dict import GenericStrDict, merge_dicts
 from vcorelib.paths import rel
 
 # internal
-from datazen.compile import get_compile_output, str_compile
-from datazen.environment.base import TaskResult
+from datazen.compile import file_compile, get_compile_output
+from datazen.environment import copy_for_merge
+from datazen.environment.base import Task, TaskResult
 from datazen.environment.task import TaskEnvironment
-from datazen.paths import advance_dict_by_path
+from datazen.output import write_if_changed
+from datazen.paths import get_dict_by_path
 from datazen.targets import resolve_dep_data
 
 LOG = logging.getLogger(__name__)
@@ -59,7 +61,9 @@ class CompileEnvironment(TaskEnvironment):
             data = data.copy()
 
             if entry.get("merge_deps", False):
-                data = merge_dicts([data, dep_data], logger=logger)
+                data = merge_dicts(
+                    [copy_for_merge(data, dep_data), dep_data], logger=logger
+                )
 
             # this isn't a good default behavior in practice, but older code
             # (and tests) rely on it
@@ -67,19 +71,22 @@ class CompileEnvironment(TaskEnvironment):
                 data.update(dep_data)
 
             # run schema validation now that all loaded data can be considered
-            if not self.cached_enforce_schemas(data, name=namespace):
+            if not self.cached_enforce_schemas(
+                data, name=namespace, logger=logger
+            ):
                 logger.error("schema validation on merged config data failed")
                 return TaskResult(False, False)
 
         # advance the dict if it was requested
         if "index_path" in entry:
-            data = advance_dict_by_path(entry["index_path"].split("."), data)
+            data = get_dict_by_path(entry["index_path"].split("."), data)
 
         # apply overrides if present
         data = resolve_dep_data(entry, data)
 
         # set task-data early, in case we don't need to re-compile
-        self.task_data["compiles"][entry["name"]] = data
+        with self.lock:
+            self.task_data["compiles"][entry["name"]] = data
 
         # make sure this compilation needs to be performed
         if self.already_satisfied(
@@ -87,15 +94,35 @@ class CompileEnvironment(TaskEnvironment):
             path,
             ["configs", "variables", "schemas"],
             deps_changed,
+            logger=logger,
+            task=Task("compiles", entry["name"]),
+            namespace=namespace,
         ):
             logger.debug("compile '%s' satisfied, skipping", entry["name"])
             return TaskResult(True, False)
 
         mode = "a" if "append" in entry and entry["append"] else "w"
-        with open(path, mode, encoding="utf-8") as out_file:
-            if "key" in entry:
-                data = data.get(str(entry["key"]), {})
-            out_file.write(str_compile(data, output_type))
-            logger.info("compiled '%s' data to '%s'", output_type, rel(path))
+        if "key" in entry:
+            data = data.get(str(entry["key"]), {})
+        written, size, time_ns = file_compile(
+            data,
+            output_type,
+            path,
+            mode,
+            write_if_changed(entry, self.manifest["data"]),
+            self.output_stats,
+            logger,
+        )
+        self.output_stats.record_encode(entry["name"], size, time_ns)
+        if written:
+            logger.info(
+                "compiled '%s' data to '%s' (%d bytes, %.1f MB/s)",
+                output_type,
+                rel(path),
+                size,
+                self.output_stats.throughput(entry["name"]) / 1e6,
+            )
+        else:
+            logger.debug("'%s' unchanged, not written", rel(path))
 
         return TaskResult(True, True)
@@ -34,7 +34,8 @@ class GroupEnvironment(TaskEnvironment):
         """Stub task to group other tasks."""
 
         if dep_data is not None:
-            self.task_data["groups"][entry["name"]] = dep_data
+            with self.lock:
+                self.task_data["groups"][entry["name"]] = dep_data
         changed = bool(deps_changed)
         if changed:
             logger.info("group '%s' updated", entry["name"])
@@ -17,7 +17,9 @@ from datazen.environment.base import TaskResult, dep_slug_unwrap
 from datazen.environment.command import CommandEnvironment
 from datazen.environment.compile import CompileEnvironment
 from datazen.environment.group import GroupEnvironment
+from datazen.environment.manifest_cache import manifest_cache_storage
 from datazen.environment.render import RenderEnvironment
+from datazen.parsing import CONTENT_HASHES
 
 
 class Environment(
@@ -33,7 +35,7 @@ class Environment(
         self.default = "compiles"
 
     def execute(
-        self, target: str = "", should_cache: bool = True
+        self, target: str = "", should_cache: bool = True, jobs: int = 1
     ) -> TaskResult:
         """Execute an arbitrary target."""
 
@@ -48,9 +50,9 @@ class Environment(
                 self.logger.info("resolving first target '%s'", target)
 
         slug = dep_slug_unwrap(target, self.default)
-        return self.handle_task(slug[0], slug[1], should_cache=should_cache)
+        return self.execute_task(slug[0], slug[1], should_cache, jobs)
 
-    def execute_targets(self, targets: List[str]) -> bool:
+    def execute_targets(self, targets: List[str], jobs: int = 1) -> bool:
         """
         Execute a list of named targets and return whether or not the entire
         set was successful.
@@ -62,7 +64,7 @@ class Environment(
 
         for target in targets:
             with log_time(self.logger, "Target '%s'", target):
-                task_result = self.execute(target, False)
+                task_result = self.execute(target, False, jobs)
                 if not task_result[0]:
                     self.logger.error("target '%s' failed", target)
                     return False
@@ -71,6 +73,15 @@ class Environment(
 
         # write the cache at the end, if we were totally successful
         self.write_cache()
+        self.logger.info("%s", self.output_stats.describe())
+        self.logger.debug("content hashes: %s", CONTENT_HASHES.describe())
+        self.logger.debug("%s", self.describe_namespaces())
+        parse_cache = self.load_options.parse_cache
+        if parse_cache is not None:
+            self.logger.debug("parse cache: %s", parse_cache.describe())
+        listings = self.load_options.listings
+        if listings is not None:
+            self.logger.debug("listing cache: %s", listings.describe())
         return True
 
     def group(self, target: str) -> TaskResult:
@@ -99,18 +110,31 @@ def from_manifest(
     newline: str = os.linesep,
     data_cache_name: str = "task_data",
     logger: logging.Logger = logging.getLogger(__name__),
+    load_workers: int = None,
+    load_pool: str = None,
 ) -> Environment:
-    """Load an environment object from a schema definition on disk."""
+    """
+    Load an environment object from a schema definition on disk. The number
+    (and kind) of workers that data files are decoded with can override the
+    manifest's settings.
+    """
+
+    # don't trust content hashes from any previous run
+    CONTENT_HASHES.clear()
 
     env = Environment(newline=newline)
 
     # load the manifest
-    if not env.load_manifest_with_cache(manifest_path):
+    if not env.load_manifest_with_cache(
+        manifest_path, load_workers=load_workers, load_pool=load_pool
+    ):
         logger.error("couldn't load manifest at '%s'", manifest_path)
     else:
         data_cache = f".{data_cache_name}{CACHE_SUFFIX}"
         assert env.cache is not None
         path = os.path.join(os.path.dirname(env.cache.cache_dir), data_cache)
-        env.init_cache(os.path.abspath(path))
+        env.init_cache(
+            os.path.abspath(path), manifest_cache_storage(env.manifest)
+        )
 
     return env
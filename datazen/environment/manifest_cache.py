@@ -5,10 +5,10 @@ datazen - A class for adding caching to the manifest-loading environment.
 # built-in
 import logging
 import os
+from time import perf_counter
 from typing import Dict, List, Optional
 
 # third-party
-import jinja2
 from vcorelib.dict import GenericStrDict
 from vcorelib.io.types import LoadResult
 from vcorelib.paths import get_file_name
@@ -18,7 +18,19 @@ from datazen import CACHE_SUFFIX, DEFAULT_MANIFEST, ROOT_NAMESPACE
 from datazen.classes.file_info_cache import FileInfoCache, cmp_total_loaded
 from datazen.classes.file_info_cache import copy as copy_cache
 from datazen.classes.file_info_cache import meld as meld_cache
+from datazen.classes.lazy_templates import LazyTemplates
+from datazen.classes.listing_cache import LISTING_CACHE_FILE, ListingCache
+from datazen.classes.parse_cache import PARSE_CACHE_DIR, ParseCache
+from datazen.classes.process_pool import ProcessPool
+from datazen.classes.template_cache import (
+    BYTECODE_CACHE_DIR,
+    BytecodeCache,
+    TemplateCache,
+)
+from datazen.enums import CacheStorage, LoadPool
 from datazen.environment.manifest import ManifestEnvironment
+from datazen.load import LoadedFiles, LoadOptions
+from datazen.paths import EXCLUDES
 
 LOG = logging.getLogger(__name__)
 
@@ -36,6 +48,38 @@ def manifest_cache_dir(path: str, manifest: GenericStrDict) -> str:
     return os.path.abspath(str(manifest["data"]["cache_dir"]))
 
 
+def manifest_cache_storage(manifest: GenericStrDict) -> CacheStorage:
+    """Find the format a manifest's cache should be stored with."""
+
+    return CacheStorage(
+        manifest["data"].get("cache_backend", CacheStorage.JSON.value)
+    )
+
+
+def manifest_load_workers(
+    manifest: GenericStrDict, workers: int = None
+) -> int:
+    """
+    Find the number of threads a manifest's data files should be decoded
+    with, unless it's been overridden.
+    """
+
+    if workers is None:
+        workers = manifest["data"].get("load_workers", 1)
+    return max(int(workers), 1)
+
+
+def manifest_load_pool(manifest: GenericStrDict, pool: str = None) -> LoadPool:
+    """
+    Find the kind of workers a manifest's data files should be decoded with,
+    unless it's been overridden.
+    """
+
+    if pool is None:
+        pool = manifest["data"].get("load_pool", LoadPool.AUTO.value)
+    return LoadPool(pool)
+
+
 class ManifestCacheEnvironment(ManifestEnvironment):
     """A wrapper for the cache functionality for an environment."""
 
@@ -46,10 +90,20 @@ class ManifestCacheEnvironment(ManifestEnvironment):
         self.cache: Optional[FileInfoCache] = None
         self.aggregate_cache: Optional[FileInfoCache] = None
         self.initial_cache: Optional[FileInfoCache] = None
+        self.load_options = LoadOptions()
         self.manifest_changed = True
 
+        # how often (in seconds) journaled cache updates are compacted into
+        # the cache snapshot during execution
+        self.cache_compact_interval = 30.0
+        self.last_compaction = perf_counter()
+
     def load_manifest_with_cache(
-        self, path: str = DEFAULT_MANIFEST, logger: logging.Logger = LOG
+        self,
+        path: str = DEFAULT_MANIFEST,
+        logger: logging.Logger = LOG,
+        load_workers: int = None,
+        load_pool: str = None,
     ) -> bool:
         """
         Load a manifest and its cache, or set up a new cache if one doesn't
@@ -60,7 +114,35 @@ class ManifestCacheEnvironment(ManifestEnvironment):
 
         # if we successfully loaded this manifest, try to load its cache
         if result:
-            self.cache = FileInfoCache(manifest_cache_dir(path, self.manifest))
+            cache_dir = manifest_cache_dir(path, self.manifest)
+            self.cache = FileInfoCache(
+                cache_dir, storage=manifest_cache_storage(self.manifest)
+            )
+            bytecode = BytecodeCache(
+                os.path.join(cache_dir, BYTECODE_CACHE_DIR)
+            )
+            workers = manifest_load_workers(self.manifest, load_workers)
+            pool = manifest_load_pool(self.manifest, load_pool)
+
+            # worker processes (if they're used) are shared by every load
+            self.shutdown_load_processes()
+            self.load_options = LoadOptions(
+                ParseCache(os.path.join(cache_dir, PARSE_CACHE_DIR)),
+                TemplateCache(bytecode),
+                bytecode,
+                workers,
+                pool,
+                tuple(
+                    EXCLUDES + self.manifest["data"].get("walk_excludes", [])
+                ),
+                ListingCache(os.path.join(cache_dir, LISTING_CACHE_FILE)),
+                bool(self.manifest["data"].get("trace_variables", False)),
+                (
+                    ProcessPool(workers)
+                    if workers > 1 and pool is not LoadPool.THREAD
+                    else None
+                ),
+            )
             self.aggregate_cache = copy_cache(self.cache)
 
             # correctly set the state of whether or not this manifest
@@ -77,6 +159,12 @@ class ManifestCacheEnvironment(ManifestEnvironment):
 
         return result and self.cache is not None
 
+    def shutdown_load_processes(self) -> None:
+        """Stop the worker processes that data files are decoded with."""
+
+        if self.load_options.processes is not None:
+            self.load_options.processes.shutdown()
+
     def clean_cache(self, purge_data: bool = True) -> None:
         """Remove cached data from the file-system."""
 
@@ -94,6 +182,24 @@ class ManifestCacheEnvironment(ManifestEnvironment):
             assert self.aggregate_cache is not None
             meld_cache(self.aggregate_cache, self.cache)
             self.aggregate_cache.write()
+            self.cache.mark_journaled()
+        if self.load_options.listings is not None:
+            self.load_options.listings.write()
+        self.last_compaction = perf_counter()
+
+    def journal_cache(self) -> None:
+        """Append cache updates to the cache journal."""
+
+        if self.cache is not None:
+            self.cache.journal_updates()
+
+    def compaction_due(self) -> bool:
+        """Determine if journaled updates should be written to the cache."""
+
+        return (
+            perf_counter() - self.last_compaction
+            >= self.cache_compact_interval
+        )
 
     def describe_cache(self) -> None:
         """Describe the [initial] cache for debugging purposes."""
@@ -124,11 +230,17 @@ class ManifestCacheEnvironment(ManifestEnvironment):
             self.cache, self.initial_cache, types, load_checks
         )
 
+    def get_loads(self, name: str) -> LoadedFiles:
+        """Get cached load data (and loading options) for a data type."""
+
+        assert self.cache is not None
+        return self.cache.get_data(name)._replace(options=self.load_options)
+
     def cached_load_variables(self, name: str = ROOT_NAMESPACE) -> LoadResult:
         """Load variables, proxied through the cache."""
 
         assert self.cache is not None
-        return self.load_variables(self.cache.get_data("variables"), name)
+        return self.load_variables(self.get_loads("variables"), name)
 
     def cached_load_schemas(
         self, require_all: bool = True, name: str = ROOT_NAMESPACE
@@ -138,8 +250,8 @@ class ManifestCacheEnvironment(ManifestEnvironment):
         assert self.cache is not None
         return self.load_schemas(
             require_all,
-            self.cache.get_data("schemas"),
-            self.cache.get_data("schema_types"),
+            self.get_loads("schemas"),
+            self.get_loads("schema_types"),
             name,
         )
 
@@ -148,6 +260,7 @@ class ManifestCacheEnvironment(ManifestEnvironment):
         data: GenericStrDict,
         require_all: bool = True,
         name: str = ROOT_NAMESPACE,
+        logger: logging.Logger = None,
     ) -> bool:
         """Enforce schemas, proxied through the cache."""
 
@@ -155,9 +268,10 @@ class ManifestCacheEnvironment(ManifestEnvironment):
         return self.enforce_schemas(
             data,
             require_all=require_all,
-            sch_loads=self.cache.get_data("schemas"),
-            sch_types_loads=self.cache.get_data("schema_types"),
+            sch_loads=self.get_loads("schemas"),
+            sch_types_loads=self.get_loads("schema_types"),
             name=name,
+            logger=logger,
         )
 
     def cached_load_configs(
@@ -167,18 +281,18 @@ class ManifestCacheEnvironment(ManifestEnvironment):
 
         assert self.cache is not None
         return self.load_configs(
-            cfg_loads=self.cache.get_data("configs"),
-            var_loads=self.cache.get_data("variables"),
-            sch_loads=self.cache.get_data("schemas"),
-            sch_types_loads=self.cache.get_data("schema_types"),
+            cfg_loads=self.get_loads("configs"),
+            var_loads=self.get_loads("variables"),
+            sch_loads=self.get_loads("schemas"),
+            sch_types_loads=self.get_loads("schema_types"),
             name=name,
             enforce_schemas=enforce_schemas,
         )
 
     def cached_load_templates(
         self, name: str = ROOT_NAMESPACE
-    ) -> Dict[str, jinja2.Template]:
+    ) -> LazyTemplates:
         """Load templates, proxied through the cache."""
 
         assert self.cache is not None
-        return self.load_templates(self.cache.get_data("templates"), name)
+        return self.load_templates(self.get_loads("templates"), name)
@@ -3,9 +3,11 @@ datazen - An environment extension that exposes rendering capabilities.
 """
 
 # built-in
+import hashlib
+from itertools import chain
 import logging
 import os
-from typing import Dict, List, Optional, cast
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple, cast
 
 # third-party
 import jinja2
@@ -14,11 +16,15 @@ from vcorelib.paths import get_file_ext, rel
 
 # internal
 from datazen import GLOBAL_KEY, to_private
-from datazen.environment.base import TaskResult, dep_slug_unwrap
+from datazen.classes.task_data_cache import TRACED_KEY
+from datazen.classes.traced_data import Accesses, trace_context, traced_changes
+from datazen.environment.base import Task, TaskResult, dep_slug_unwrap
 from datazen.environment.task import TaskEnvironment, get_path
-from datazen.fingerprinting import build_fingerprint
+from datazen.fingerprinting import HASH_PLACEHOLDER, build_fingerprint
 from datazen.load import data_added
+from datazen.output import write_if_changed, write_output, write_stream
 from datazen.targets import resolve_dep_data
+from datazen.templates import template_dependencies
 
 LOG = logging.getLogger(__name__)
 
@@ -34,14 +40,51 @@ def indent_str(data: str, indent: int, newline: str = os.linesep) -> str:
     Attempt to indent String data by some amount, based on some separator.
     """
 
-    result = ""
     ind_str = " " * indent
-    for line in data.split(newline):
-        if line:
-            result += ind_str + line + newline
+    return "".join(
+        ind_str + line + newline if line else newline
+        for line in data.split(newline)
+    ).rstrip()
+
+
+def rstrip_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Remove trailing whitespace from text that's produced in chunks, without
+    holding all of the text in memory.
+    """
+
+    pending = ""
+    for chunk in chunks:
+        stripped = chunk.rstrip()
+        if stripped:
+            yield pending + stripped
+            pending = chunk[len(stripped) :]
         else:
-            result += newline
-    return result.rstrip()
+            pending += chunk
+
+
+def indent_chunks(
+    chunks: Iterable[str], indent: int, newline: str = os.linesep
+) -> Iterator[str]:
+    """
+    Indent (non-empty) lines of text that's produced in chunks, chunks must
+    not end in the middle of a newline sequence.
+    """
+
+    ind_str = " " * indent
+    line_start = True
+    for chunk in chunks:
+        result = []
+        for idx, part in enumerate(chunk.split(newline)):
+            if idx:
+                result.append(newline)
+                line_start = True
+            if part:
+                if line_start:
+                    result.append(ind_str)
+                result.append(part)
+                line_start = False
+        yield "".join(result)
 
 
 def get_render_str(
@@ -104,68 +147,182 @@ class RenderEnvironment(TaskEnvironment):
         super().__init__(**kwargs)
         self.handles["renders"] = self.valid_render
 
+    def stream_render(
+        self,
+        template: jinja2.Template,
+        path: str,
+        entry: GenericStrDict,
+        data: GenericStrDict,
+        dynamic: bool = True,
+    ) -> str:
+        """
+        Render a template directly to the requested path as output is
+        produced (instead of rendering to a String first), return the hash of
+        the rendered content.
+        """
+
+        digest = hashlib.md5()
+        fprint = build_fingerprint(
+            "",
+            get_file_ext(get_path(entry)),
+            dynamic=dynamic,
+            newline=self.newline,
+            file_hash=HASH_PLACEHOLDER,
+        )
+
+        def content() -> Iterator[str]:
+            """Produce the fingerprint and content, hash the content."""
+
+            yield fprint
+            for chunk in chain(
+                indent_chunks(
+                    rstrip_chunks(template.generate(data)),
+                    entry["indent"],
+                    self.newline,
+                ),
+                [self.newline],
+            ):
+                # Ensure that file hashes are evaluated based on the
+                # configured newlines and not the platform ones.
+                digest.update(
+                    (
+                        chunk.replace(os.linesep, self.newline)
+                        if os.linesep != self.newline
+                        else chunk
+                    ).encode("utf-8")
+                )
+                yield chunk
+
+        def patch() -> Tuple[int, str]:
+            """Replace the fingerprint's placeholder hash."""
+
+            offset = fprint[: fprint.index(HASH_PLACEHOLDER)]
+            return (
+                len(offset.replace("\n", os.linesep).encode("utf-8")),
+                digest.hexdigest(),
+            )
+
+        # add a self-reference key for convenience
+        global_added = GLOBAL_KEY not in data
+        if global_added:
+            data[GLOBAL_KEY] = data
+
+        try:
+            if not write_stream(
+                path,
+                content(),
+                write_if_changed(entry, self.manifest["data"]),
+                self.output_stats,
+                patch if HASH_PLACEHOLDER in fprint else None,
+            ):
+                LOG.debug("'%s' unchanged, not written", rel(path))
+        finally:
+            if global_added:
+                del data[GLOBAL_KEY]
+
+        return digest.hexdigest()
+
     def perform_render(
         self,
         template: jinja2.Template,
-        all_templates: Dict[str, jinja2.Template],
+        all_templates: Mapping[str, jinja2.Template],
         path: Optional[str],
         entry: GenericStrDict,
         data: GenericStrDict = None,
         logger: logging.Logger = LOG,
+        accesses: Accesses = None,
     ) -> TaskResult:
         """
-        Render a template to the requested path using the provided data.
+        Render a template to the requested path using the provided data,
+        optionally record the data that the template accesses.
         """
 
+        # determine if the caller wanted a dynamic fingerprint or not,
+        # if an indent is set, also disable it
+        dynamic = True
+        if (
+            "no_dynamic_fingerprint" in entry
+            and entry["no_dynamic_fingerprint"]
+        ) or entry["indent"]:
+            dynamic = False
+
         try:
             out_data: GenericStrDict = {}
 
+            # trace the data before template objects are added (they aren't
+            # data, so accessing them isn't recorded)
+            context = data
+            if accesses is not None:
+                context = trace_context(data or {}, accesses)
+
             # add template objects to render context
             with data_added(
-                to_private("templates"), all_templates, data
+                to_private("templates"), all_templates, context
             ) as render_data:
-                render_str = (
-                    get_render_str(
-                        template,
-                        entry["name"],
-                        entry["indent"],
-                        render_data,
-                        out_data,
-                        self.newline,
+                # stream output directly to the file if requested (only the
+                # hash of the output is stored)
+                render_str: Optional[str] = None
+                if path is not None and self.streamed(entry, logger):
+                    out_data[f"{render_name_to_key(entry['name'])}_hash"] = (
+                        self.stream_render(
+                            template, path, entry, render_data, dynamic
+                        )
+                    )
+                else:
+                    render_str = (
+                        get_render_str(
+                            template,
+                            entry["name"],
+                            entry["indent"],
+                            render_data,
+                            out_data,
+                            self.newline,
+                        )
+                        + self.newline
                     )
-                    + self.newline
-                )
 
-            # determine if the caller wanted a dynamic fingerprint or not,
-            # if an indent is set, also disable it
-            dynamic = True
-            if (
-                "no_dynamic_fingerprint" in entry
-                and entry["no_dynamic_fingerprint"]
-            ) or entry["indent"]:
-                dynamic = False
-
-            fprint = build_fingerprint(
-                # Ensure that file hashes are evaluated based on the configured
-                # newlines and not the platform ones.
-                (
-                    render_str.replace(os.linesep, self.newline)
-                    if os.linesep != self.newline
-                    else render_str
-                ),
-                get_file_ext(get_path(entry)),
-                dynamic=dynamic,
-                newline=self.newline,
-            )
+            if render_str is not None:
+                fprint = build_fingerprint(
+                    # Ensure that file hashes are evaluated based on the
+                    # configured newlines and not the platform ones.
+                    (
+                        render_str.replace(os.linesep, self.newline)
+                        if os.linesep != self.newline
+                        else render_str
+                    ),
+                    get_file_ext(get_path(entry)),
+                    dynamic=dynamic,
+                    newline=self.newline,
+                )
 
-            # don't write a file, if requested
-            if path is not None:
-                with open(path, "w", encoding="utf-8") as render_out:
-                    render_out.write(fprint)
-                    render_out.write(render_str)
+                # don't write a file, if requested
+                if path is not None and not write_output(
+                    path,
+                    fprint + render_str,
+                    if_changed=write_if_changed(entry, self.manifest["data"]),
+                    stats=self.output_stats,
+                ):
+                    logger.debug("'%s' unchanged, not written", rel(path))
 
             # save the output into a dict for consistency
             self.store_render(entry, out_data)
+        except TypeError as exc:
+            # traced data can't be used everywhere plain data can (e.g. by
+            # filters that serialize it), render without tracing instead
+            if accesses is None:
+                raise
+            logger.debug(
+                "couldn't trace data for '%s' (%s), rendering untraced",
+                entry["name"],
+                exc,
+            )
+            with self.lock:
+                self.task_data[TRACED_KEY].pop(
+                    Task("renders", entry["name"]).slug, None
+                )
+            return self.perform_render(
+                template, all_templates, path, entry, data, logger
+            )
         except jinja2.exceptions.TemplateError as exc:
             logger.error(
                 "couldn't render '%s' to '%s': %s", entry["name"], path, exc
@@ -174,8 +331,40 @@ class RenderEnvironment(TaskEnvironment):
 
         logger.info("(%s) rendered '%s'", entry["name"], rel(path))
 
+        # store the data that was accessed, so that the render can be skipped
+        # if none of it changes
+        if accesses is not None:
+            with self.lock:
+                self.task_data[TRACED_KEY][
+                    Task("renders", entry["name"]).slug
+                ] = [[list(x), y] for x, y in accesses.items()]
+
         return TaskResult(True, True)
 
+    def streamed(
+        self, entry: GenericStrDict, logger: logging.Logger = LOG
+    ) -> bool:
+        """
+        Determine if a render's output should be streamed to its file. Output
+        that's captured (with 'as', or as another render's child) is always
+        rendered to a String.
+        """
+
+        if not entry.get("stream", False):
+            return False
+
+        task = Task("renders", entry["name"])
+        captured = bool(entry.get("as")) or any(
+            dep_slug_unwrap(child, self.default) == task
+            for render in self.manifest["data"].get("renders", [])
+            for child in render.get("children", [])
+        )
+        if captured:
+            logger.debug(
+                "render '%s' output is captured, not streaming", entry["name"]
+            )
+        return not captured
+
     def store_render(
         self, entry: GenericStrDict, data: GenericStrDict
     ) -> None:
@@ -186,7 +375,8 @@ class RenderEnvironment(TaskEnvironment):
             data[entry["as"]] = data[name_key]
             if entry["as"] != name_key:
                 del data[name_key]
-        self.task_data["renders"][entry["name"]] = data
+        with self.lock:
+            self.task_data["renders"][entry["name"]] = data
 
     def valid_render(
         self,
@@ -224,11 +414,18 @@ class RenderEnvironment(TaskEnvironment):
         template = templates[temp_name]
 
         # if dependencies aren't specified, use config data (but don't allow
-        # an implicit 'compile')
+        # an implicit 'compile'), the render context is modified so don't
+        # share it with other tasks using the same namespace
         change_criteria = ["templates"]
+        traced = False
         if not dep_data and "dependencies" not in entry:
-            dep_data = self.cached_load_configs(namespace)[0]
-            change_criteria.append("configs")
+            dep_data = dict(self.cached_load_configs(namespace)[0])
+
+            # if the data accessed by the template is traced, only changes
+            # to that data are considered (instead of any config changes)
+            traced = entry.get("trace_data", False)
+            if not traced:
+                change_criteria.append("configs")
             logger.debug(
                 "no dependencies loaded for '%s', using config data",
                 entry["name"],
@@ -249,19 +446,61 @@ class RenderEnvironment(TaskEnvironment):
                 newline=self.newline,
             )
 
-        # determine if we need to perform this render
+        # determine if we need to perform this render (consider templates
+        # referenced by this one, as well as explicit dependencies)
         assert template.filename is not None
         load_checks = {
-            "templates": [template.filename]
+            "templates": template_dependencies(
+                templates,
+                templates.source(temp_name),
+                self.load_options.parse_cache,
+            )
             + [
                 cast(str, templates[x].filename)
                 for x in entry.get("template_dependencies", [])
             ]
         }
+        task = Task("renders", entry["name"])
         if self.already_satisfied(
-            entry["name"], path, change_criteria, deps_changed, load_checks
+            entry["name"],
+            path,
+            change_criteria,
+            deps_changed,
+            load_checks,
+            logger=logger,
+            task=task,
+            namespace=namespace,
+        ) and not (
+            traced
+            and dep_data is not None
+            and self.traced_changed(task, dep_data, logger)
         ):
             logger.debug("render '%s' satisfied, skipping", entry["name"])
             return TaskResult(True, False)
 
-        return self.perform_render(template, templates, path, entry, dep_data)
+        return self.perform_render(
+            template,
+            templates,
+            path,
+            entry,
+            dep_data,
+            accesses={} if traced else None,
+        )
+
+    def traced_changed(
+        self, task: Task, data: GenericStrDict, logger: logging.Logger = LOG
+    ) -> bool:
+        """
+        Determine if any of the data that a render accessed (the last time it
+        was performed) is different in some data.
+        """
+
+        with self.lock:
+            records = self.task_data[TRACED_KEY].get(task.slug)
+        if records is None:
+            return True
+
+        changes = traced_changes(records, data)
+        if changes:
+            logger.debug("%s: %d traced data updates", task.name, changes)
+        return changes != 0
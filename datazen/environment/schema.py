@@ -4,6 +4,7 @@ datazen - A child class for adding schema-data loading capabilities to the
 """
 
 # built-in
+import logging
 from typing import List
 
 # third-party
@@ -80,12 +81,16 @@ class SchemaEnvironment(BaseEnvironment):
         sch_loads: LoadedFiles = DEFAULT_LOADS,
         sch_types_loads: LoadedFiles = DEFAULT_LOADS,
         name: str = ROOT_NAMESPACE,
+        logger: logging.Logger = None,
     ) -> bool:
         """
         Perform schema-validation on provided data and return the boolean
         result. Adds (and removes) namespaced types if applicable.
         """
 
+        if logger is None:
+            logger = self.logger
+
         with self.lock:
             sch_types = self.load_schema_types(sch_types_loads, name)
             with inject_custom_schemas(sch_types):
@@ -94,7 +99,7 @@ class SchemaEnvironment(BaseEnvironment):
                         require_all, sch_loads, sch_types_loads, name, False
                     ),
                     data,
-                    self.logger,
+                    logger,
                 )
 
         return result
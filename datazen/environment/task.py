@@ -16,15 +16,33 @@ from vcorelib.dict import GenericStrDict, merge
 
 # internal
 from datazen import ROOT_NAMESPACE
-from datazen.classes.task_data_cache import TaskDataCache
+from datazen.classes.output_stats import OutputStats
+from datazen.classes.task_data_cache import (
+    CONSUMED_KEY,
+    INPUTS_KEY,
+    TRACED_KEY,
+    TaskDataCache,
+)
+from datazen.classes.task_graph import TaskGraph
+from datazen.enums import CacheStorage, DataType
 from datazen.environment.base import Task, TaskResult, dep_slug_unwrap
 from datazen.environment.manifest import set_output_dir
 from datazen.environment.manifest_cache import ManifestCacheEnvironment
+from datazen.parsing import file_hash
 
 LOG = logging.getLogger(__name__)
 
 TaskFunction = Callable[..., TaskResult]
 
+# the data type for each kind of directory a task can load
+LOAD_TYPES = {
+    "configs": DataType.CONFIG,
+    "schemas": DataType.SCHEMA,
+    "schema_types": DataType.SCHEMA_TYPES,
+    "templates": DataType.TEMPLATE,
+    "variables": DataType.VARIABLE,
+}
+
 
 class TaskEnvironment(ManifestCacheEnvironment):
     """
@@ -60,12 +78,15 @@ class TaskEnvironment(ManifestCacheEnvironment):
             lambda: self.valid_noop
         )
         self.data_cache: Optional[TaskDataCache] = None
+        self.output_stats = OutputStats()
 
-    def init_cache(self, cache_dir: str) -> None:
+    def init_cache(
+        self, cache_dir: str, storage: CacheStorage = CacheStorage.JSON
+    ) -> None:
         """Initialize the task-data cache."""
 
         if self.data_cache is None:
-            self.data_cache = TaskDataCache(cache_dir)
+            self.data_cache = TaskDataCache(cache_dir, storage)
 
     def write_cache(self) -> None:
         """Commit cached data to the file-system."""
@@ -74,6 +95,23 @@ class TaskEnvironment(ManifestCacheEnvironment):
         if self.data_cache is not None:
             self.data_cache.save()
 
+    def journal_task(self, task: Task) -> None:
+        """
+        Journal cache updates made by a task (and its task data), compact
+        the journal into the cache if enough time has passed since the last
+        compaction.
+        """
+
+        self.journal_cache()
+        if self.data_cache is not None:
+            self.data_cache.record(task.variant, task.name)
+            self.data_cache.record(CONSUMED_KEY, task.slug)
+            self.data_cache.record(INPUTS_KEY, task.slug)
+            self.data_cache.record(TRACED_KEY, task.slug)
+
+        if self.compaction_due():
+            self.write_cache()
+
     def clean_cache(self, purge_data: bool = True) -> None:
         """Remove cached data from the file-system."""
 
@@ -111,8 +149,10 @@ class TaskEnvironment(ManifestCacheEnvironment):
         with self.lock:
             self.visited[task.slug] = True
             self.is_new[task.slug] = is_new
+            if self.data_cache is not None:
+                self.data_cache.resolve(operation, target, task.slug)
             if should_cache:
-                self.write_cache()
+                self.journal_task(task)
 
     def push_dep(
         self, dep: str, task_stack: List[Task], curr_target: str
@@ -157,15 +197,25 @@ class TaskEnvironment(ManifestCacheEnvironment):
         deps_changed: List[str] = None,
         load_checks: Dict[str, List[str]] = None,
         logger: logging.Logger = LOG,
+        task: Task = None,
+        namespace: str = ROOT_NAMESPACE,
     ) -> bool:
         """
         Check if a target is already satisfied, if not debug-log some
-        information about why not.
+        information about why not. If the task is provided, only changes to
+        the files that its namespace loads are considered.
         """
 
         is_file = True if output_path is None else os.path.isfile(output_path)
         with self.lock:
-            newly_loaded = self.get_new_loaded(load_deps, load_checks)
+            if task is None:
+                newly_loaded = self.get_new_loaded(load_deps, load_checks)
+            else:
+                assert self.data_cache is not None
+                newly_loaded = self.data_cache.changed_inputs(
+                    task.slug,
+                    self.get_task_inputs(namespace, load_deps, load_checks),
+                )
             result = (
                 not self.manifest_changed
                 and is_file
@@ -184,17 +234,56 @@ class TaskEnvironment(ManifestCacheEnvironment):
 
         return result
 
+    def get_task_inputs(
+        self,
+        namespace: str,
+        load_deps: List[str],
+        load_checks: Dict[str, List[str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Get the (current) hashes of the files that a namespace loads for some
+        data types, or only the files that are checked for a data type.
+        """
+
+        assert self.cache is not None
+
+        result = {}
+        for load_dep in load_deps:
+            hashes = self.cache.get_hashes(load_dep)
+            if load_checks is not None and load_dep in load_checks:
+                paths = [os.path.abspath(x) for x in load_checks[load_dep]]
+            else:
+                dirs = tuple(
+                    os.path.join(x["path"], "")
+                    for x in self.namespaces[namespace].directories[
+                        LOAD_TYPES[load_dep]
+                    ]
+                )
+                paths = [x for x in hashes if x.startswith(dirs)]
+            for path in paths:
+                if path in hashes:
+                    result[path] = hashes[path]["hash"]
+
+                # checked files aren't necessarily loaded
+                elif os.path.isfile(path):
+                    result[path] = file_hash(path)
+
+        return result
+
     def resolve_dependencies(
         self,
         dep_list: List[str],
         task_stack: List[Task],
         target: str,
         logger: logging.Logger = LOG,
+        task: Task = None,
     ) -> Tuple[bool, GenericStrDict, List[str]]:
         """
         Execute the entire chain of dependencies for a task, return the
         aggregate result as a boolean as well as the dependency data and which
-        dependencies changed.
+        dependencies changed. If the dependent task is provided, dependencies
+        that were updated but produced the same data that it consumed last
+        time aren't considered changed.
         """
 
         deps_changed = []
@@ -203,23 +292,75 @@ class TaskEnvironment(ManifestCacheEnvironment):
 
             # resolve dependencies
             while task_stack:
-                task = task_stack.pop()
+                dep_task = task_stack.pop()
                 result = self.handle_task(
-                    task.variant, task.name, task_stack, False
+                    dep_task.variant, dep_task.name, task_stack, False
                 )
-                self.logger = self.logger_init
 
                 # if a dependency failed, propagate it up
                 if not result.success:
                     return False, {}, []
                 # otherwise if a dependency was updated
-                # (performed), capture it in a list
-                if result.fresh or self.is_task_new(task.variant, task.name):
-                    deps_changed.append(task.slug)
+                # (performed) and its data changed, capture it in a list
+                if (
+                    result.fresh
+                    or self.is_task_new(dep_task.variant, dep_task.name)
+                ) and (
+                    task is None
+                    or self.data_cache is None
+                    or self.data_cache.output_changed(dep_task.slug, task.slug)
+                ):
+                    deps_changed.append(dep_task.slug)
 
         # provide dependency data as "flattened"
         return True, self.get_dep_data(dep_list, logger), deps_changed
 
+    def get_task_deps(self, task: Task) -> List[Task]:
+        """Get the direct dependencies of a task from the manifest."""
+
+        if task.variant not in self.manifest["data"]:
+            return []
+
+        data = self.get_manifest_entry(task.variant, task.name)
+        if data["name"] is None:
+            return []
+
+        return [dep_slug_unwrap(x, self.default) for x in get_dep_list(data)]
+
+    def execute_task(
+        self,
+        key_name: str,
+        target: str,
+        should_cache: bool = True,
+        jobs: int = 1,
+    ) -> TaskResult:
+        """
+        Execute a task and all of its dependencies. If more than one job is
+        requested, build the entire dependency graph up front and execute
+        every task whose dependencies are satisfied on a pool of workers.
+        """
+
+        if jobs <= 1:
+            return self.handle_task(
+                key_name, target, should_cache=should_cache
+            )
+
+        root = Task(key_name, target)
+        graph = TaskGraph.build(root, self.get_task_deps)
+        self.logger.debug(
+            "executing %d task(s) for '%s' with %d jobs",
+            len(graph.dependencies),
+            root.slug,
+            jobs,
+        )
+        graph.execute(
+            lambda task: self.handle_task(
+                task.variant, task.name, should_cache=should_cache
+            ),
+            jobs,
+        )
+        return graph.results.get(root, TaskResult(False, False))
+
     def get_manifest_entry(self, category: str, name: str) -> GenericStrDict:
         """Get an entry from the manifest."""
 
@@ -244,9 +385,10 @@ class TaskEnvironment(ManifestCacheEnvironment):
         directories and setting the correct output directory.
         """
 
+        # tasks can be handled concurrently, so each logs with its own logger
+        # (instead of updating the environment's)
         task = Task(key_name, target)
         logger = logging.getLogger(task.slug)
-        self.logger = logger
 
         # fall back on default behavior if the manifest doesn't even have
         # an entry for this key
@@ -270,8 +412,9 @@ class TaskEnvironment(ManifestCacheEnvironment):
         logger.debug("executing '%s'", task.slug)
 
         # push dependencies
+        dep_list = get_dep_list(data)
         dep_result = self.resolve_dependencies(
-            get_dep_list(data), task_stack, target, logger
+            dep_list, task_stack, target, logger, task
         )
         if not dep_result[0]:
             return TaskResult(False, False)
@@ -298,6 +441,12 @@ class TaskEnvironment(ManifestCacheEnvironment):
             data, namespace, dep_result[1], dep_result[2], logger=logger
         )
         if result.success:
+            with self.lock:
+                assert self.data_cache is not None
+                self.data_cache.consume(
+                    task.slug,
+                    (dep_slug_unwrap(x, self.default).slug for x in dep_list),
+                )
             self.resolve(key_name, target, should_cache, result.fresh)
 
         # Update the execution time and log the result.
@@ -4,13 +4,15 @@ datazen - A child class for adding template-loading capabilities to the
 """
 
 # built-in
-from typing import Dict, List
+from typing import Dict, List, Tuple, cast
 
 # third-party
 import jinja2
+from vcorelib.dict import GenericStrDict
 
 # internal
 from datazen import ROOT_NAMESPACE
+from datazen.classes.lazy_templates import LazyTemplates
 from datazen.enums import DataType
 from datazen.environment.base import BaseEnvironment
 from datazen.load import DEFAULT_LOADS, LoadedFiles
@@ -23,11 +25,20 @@ class TemplateEnvironment(BaseEnvironment):
     capability to function.
     """
 
+    def __init__(self, **kwargs) -> None:
+        """Add storage for Jinja environments to the environment."""
+
+        super().__init__(**kwargs)
+
+        # namespaces that load the same template directories share an
+        # environment (and its compiled templates)
+        self.jinja_environments: Dict[Tuple[str, ...], jinja2.Environment] = {}
+
     def load_templates(
         self,
         template_loads: LoadedFiles = DEFAULT_LOADS,
         name: str = ROOT_NAMESPACE,
-    ) -> Dict[str, jinja2.Template]:
+    ) -> LazyTemplates:
         """Load templates, resolve any un-loaded template directories."""
 
         # determine directories that need to be loaded
@@ -37,9 +48,18 @@ class TemplateEnvironment(BaseEnvironment):
             to_load = self.get_to_load(data_type, name)
 
             # load new templates
-            template_data = self.get_data(data_type, name)
+            data = self.namespaces[name].data
+            if not isinstance(data[data_type], LazyTemplates):
+                data[data_type] = cast(
+                    GenericStrDict, LazyTemplates(data[data_type])
+                )
+            template_data = cast(LazyTemplates, data[data_type])
             if to_load:
-                template_data.update(load_templates(to_load, template_loads))
+                template_data.update(
+                    load_templates(
+                        to_load, template_loads, self.jinja_environments
+                    )
+                )
                 self.update_load_state(data_type, to_load, name)
 
         return template_data
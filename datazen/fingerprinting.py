@@ -14,18 +14,24 @@ from datazen import PKG_NAME, VERSION
 
 BARRIER = "="
 
+# a stand-in for a file hash (of the same length) that isn't known yet
+HASH_PLACEHOLDER = "?" * 32
+
 
 def get_comment_data(
-    file_data: str, dynamic: bool = True
+    file_data: str, dynamic: bool = True, file_hash: str = None
 ) -> List[Tuple[str, str]]:
     """
     Get tuples (key-value pairs) of data to write into the file fingerprint.
     """
 
+    if file_hash is None:
+        file_hash = str_md5_hex(file_data)
+
     line_data = [
         (False, ("generator", PKG_NAME)),
         (True, ("version", VERSION)),
-        (False, ("hash", str_md5_hex(file_data))),
+        (False, ("hash", file_hash)),
     ]
 
     # filter out any possibly undesired data
@@ -89,6 +95,7 @@ def build_fingerprint(
     char: str = BARRIER,
     dynamic: bool = True,
     newline: str = os.linesep,
+    file_hash: str = None,
 ) -> str:
     """
     Build a String that should be prepended to the final file output for
@@ -96,7 +103,7 @@ def build_fingerprint(
     """
 
     comment_lines = []
-    line_data = get_comment_data(file_data, dynamic)
+    line_data = get_comment_data(file_data, dynamic, file_hash)
     for line in line_data:
         comment_lines.append(f"{line[0]}={line[1]}")
     apply_barriers(comment_lines, char)
@@ -4,29 +4,94 @@ datazen - APIs for loading data from directory trees.
 
 # built-in
 from collections import defaultdict
-from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+import hashlib
 import logging
 import os
-from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
 
 # third-party
-from vcorelib.dict import GenericStrDict
+import jinja2
+from vcorelib.dict import GenericStrDict, merge
 from vcorelib.io.types import LoadResult
 from vcorelib.paths import Pathlike, get_file_name, normalize
 
 # internal
 from datazen import GLOBAL_KEY
+from datazen.classes.listing_cache import ListingCache
+from datazen.classes.parse_cache import ParseCache
+from datazen.classes.process_pool import ProcessPool
+from datazen.classes.subtree_snapshots import SubtreeSnapshots
+from datazen.classes.template_cache import TemplateCache
+from datazen.decoding import (
+    decode_chunk,
+    decode_file,
+    traced_fingerprint,
+    unpack_results,
+)
+from datazen.enums import LoadPool
+from datazen.parsing import data_md5, file_hash
 from datazen.parsing import load as load_raw_resolve
 from datazen.parsing import set_file_hash
 from datazen.paths import (
+    EXCLUDES,
     advance_dict_by_path,
-    get_path_list,
-    walk_with_excludes,
+    get_dict_by_path,
+    walk_parts,
 )
 
 LOG = logging.getLogger(__name__)
 
 
+class LoadOptions(NamedTuple):
+    """Caches (and settings) used when loading data from files."""
+
+    parse_cache: Optional[ParseCache] = None
+    template_cache: Optional[TemplateCache] = None
+    bytecode_cache: Optional[jinja2.BytecodeCache] = None
+
+    # the number of workers to decode files with (files are still melded in
+    # order, on the calling thread)
+    workers: int = 1
+    pool: LoadPool = LoadPool.AUTO
+
+    # (glob) patterns for directories that aren't walked, and listings of
+    # directories that haven't changed
+    excludes: Tuple[str, ...] = tuple(EXCLUDES)
+    listings: Optional[ListingCache] = None
+
+    # record the variables that rendering each file accesses, so that files
+    # are only rendered again when those variables change
+    trace_variables: bool = False
+
+    # worker processes shared by loads (otherwise each load starts its own)
+    processes: Optional[ProcessPool] = None
+
+
+DEFAULT_OPTIONS = LoadOptions()
+
+# in the 'auto' pool mode, trees with at least this much file data (in
+# bytes) are decoded with processes, smaller trees don't pay for starting
+# them
+PROCESS_THRESHOLD = 4 * 1024 * 1024
+
+# worker processes decode files in chunks, so that the variables files are
+# resolved with are only sent once per chunk
+PROCESS_CHUNK = 64
+
+
 class LoadedFiles(NamedTuple):
     """
     A collection of data for files loaded at runtime (or, a continuation of
@@ -35,6 +100,7 @@ class LoadedFiles(NamedTuple):
 
     files: Optional[List[str]] = None
     file_data: Optional[Dict[str, GenericStrDict]] = None
+    options: LoadOptions = DEFAULT_OPTIONS
 
 
 DEFAULT_LOADS = LoadedFiles()
@@ -56,6 +122,94 @@ def data_added(
         del data[key]
 
 
+class DirectoryLoad(NamedTuple):
+    """The data needed to load the files in a single directory."""
+
+    root: str
+    files: List[str]
+    parts: Tuple[str, ...]
+    variables: GenericStrDict
+    globals_added: bool
+
+    # a digest of the variables (if the data decoded from files is cached)
+    variables_hash: Optional[str] = None
+
+
+def file_variables(
+    path: Pathlike, variables: GenericStrDict, globals_added: bool = False
+) -> GenericStrDict:
+    """
+    Get the variables that a file should be resolved with, variables under
+    the file's key are used if they're present (with global data still
+    exposed). The provided variables aren't modified.
+    """
+
+    key = get_file_name(path)
+    if not key or key not in variables:
+        return variables
+
+    result = variables[key]
+    if globals_added and GLOBAL_KEY not in result:
+        result = {**result, GLOBAL_KEY: variables[GLOBAL_KEY]}
+    return cast(GenericStrDict, result)
+
+
+def file_variables_hash(
+    path: Pathlike, directory: DirectoryLoad
+) -> Optional[str]:
+    """
+    Get a digest of the variables that a file in a directory should be
+    resolved with (from the digest of the directory's variables).
+    """
+
+    key = get_file_name(path)
+    if (
+        directory.variables_hash is None
+        or not key
+        or key not in directory.variables
+    ):
+        return directory.variables_hash
+
+    # a file's variables are determined by the directory's and its key
+    data = f"{directory.variables_hash}:{int(directory.globals_added)}:{key}"
+    return hashlib.md5(data.encode("utf-8")).hexdigest()
+
+
+def directory_files(
+    directory: DirectoryLoad,
+) -> List[Tuple[str, GenericStrDict, Optional[str]]]:
+    """
+    Get the path to each file in a directory, along with the variables (and
+    a digest of them, if it's known) that it should be resolved with.
+    """
+
+    result = []
+    for name in directory.files:
+        path = os.path.join(directory.root, name)
+        result.append(
+            (
+                path,
+                file_variables(
+                    path, directory.variables, directory.globals_added
+                ),
+                file_variables_hash(path, directory),
+            )
+        )
+    return result
+
+
+def file_data(path: Pathlike, existing_data: GenericStrDict) -> GenericStrDict:
+    """Get the dictionary that a file's data should be melded into."""
+
+    # allow directory/.{file_type} to be equivalent to directory.{file_type}
+    key = get_file_name(path)
+    if not key:
+        return existing_data
+    if key not in existing_data:
+        existing_data[key] = {}
+    return cast(GenericStrDict, existing_data[key])
+
+
 def meld_and_resolve(
     path: Pathlike,
     existing_data: GenericStrDict,
@@ -70,34 +224,66 @@ def meld_and_resolve(
     existing data is a template and attempt to resolve variables.
     """
 
-    variables_root: GenericStrDict = variables
+    return load_raw_resolve(
+        path,
+        file_variables(path, variables, globals_added),
+        file_data(path, existing_data),
+        expect_overwrite,
+        is_template,
+        **kwargs,
+    ).success
 
-    # allow directory/.{file_type} to be equivalent to directory.{file_type}
-    key = get_file_name(path)
-    if not key:
-        data_dict = existing_data
-    else:
-        if key not in existing_data:
-            existing_data[key] = {}
-        data_dict = existing_data[key]
-        if key in variables:
-            variables = variables[key]
-
-    # meld the data
-    global_add_success: bool = False
-    if globals_added:
-        if GLOBAL_KEY not in variables:
-            variables[GLOBAL_KEY] = variables_root[GLOBAL_KEY]
-            global_add_success = True
-
-    result = load_raw_resolve(
-        path, variables, data_dict, expect_overwrite, is_template, **kwargs
+
+def directory_loads(
+    path: Pathlike,
+    variables: GenericStrDict,
+    logger: logging.Logger = LOG,
+    options: LoadOptions = DEFAULT_OPTIONS,
+) -> Iterator[DirectoryLoad]:
+    """
+    Walk a directory tree and determine the variables that each directory's
+    files should be resolved with.
+    """
+
+    # directories are walked top-down, so each directory's variables can be
+    # found from its parent's
+    cursors: Dict[Tuple[str, ...], GenericStrDict] = {(): variables}
+
+    # variables are digested once per directory (rather than for each file)
+    # if decoded data is cached
+    global_hash = (
+        data_md5(variables) if options.parse_cache is not None else None
     )
 
-    if global_add_success:
-        del variables[GLOBAL_KEY]
+    for root, parts, _, files in walk_parts(
+        normalize(path), options.excludes, options.listings
+    ):
+        if parts:
+            cursors[parts] = get_dict_by_path([parts[-1]], cursors[parts[:-1]])
+        variable_data = cursors[parts]
 
-    return result.success
+        # expose data globally, if it was provided
+        added_globals: bool = False
+        if GLOBAL_KEY not in variable_data:
+            variable_data = {**variable_data, GLOBAL_KEY: variables}
+            added_globals = True
+        else:
+            logger.info(
+                "can't add 'global' data to '%s', key was already found",
+                root,
+            )
+
+        variables_hash = None
+        if global_hash is not None:
+            variables_hash = data_md5(cursors[parts]) if parts else global_hash
+            if added_globals:
+                variables_hash = hashlib.md5(
+                    f"{variables_hash}:{global_hash}".encode("utf-8")
+                ).hexdigest()
+
+        yield DirectoryLoad(
+            root, files, parts, variable_data, added_globals, variables_hash
+        )
 
 
 def load_dir(
@@ -115,50 +301,309 @@ def load_dir(
         variables = {}
 
     total_errors = 0
-    path = normalize(path)
-    for root, _, files in walk_with_excludes(path):
-        logger.debug("loading '%s'", root)
+    with ExitStack() as stack:
+        directories = list(
+            directory_loads(path, variables, logger, loads.options)
+        )
 
-        path_list = get_path_list(os.path.abspath(path), root)
-        variable_data = advance_dict_by_path(path_list, variables)
+        # data for directories that haven't changed can be restored
+        snapshots = subtree_snapshots(
+            directories,
+            variables,
+            expect_overwrite,
+            are_templates,
+            loads.options,
+        )
 
-        # expose data globally, if it was provided
-        added_globals: bool = False
-        if GLOBAL_KEY not in variable_data:
-            variable_data[GLOBAL_KEY] = variables
-            added_globals = True
-        else:
-            logger.info(
-                "can't add 'global' data to '%s', key was already found",
-                root,
+        # directories are melded top-down, so each directory's data can be
+        # found from its parent's
+        cursors: Dict[Tuple[str, ...], GenericStrDict] = {(): existing_data}
+
+        # start decoding every (likely needed) file before any data is melded
+        for directory, results in zip(
+            directories,
+            start_decoding(
+                stack,
+                directories,
+                are_templates,
+                loads.options,
+                (
+                    snapshots.probe(x.parts for x in directories)
+                    if snapshots is not None
+                    else set()
+                ),
+            ),
+        ):
+            if directory.parts:
+                cursors[directory.parts] = advance_dict_by_path(
+                    [directory.parts[-1]], cursors[directory.parts[:-1]]
+                )
+
+            if snapshots is not None:
+                snapshots.finish(directory.parts, cursors, total_errors)
+                if snapshots.skipped(directory.parts) or snapshots.restore(
+                    directory.parts, cursors[directory.parts]
+                ):
+                    logger.debug("restored '%s'", directory.root)
+                    if loads.files is not None:
+                        loads.files.extend(
+                            restored_files(directory, loads.file_data)
+                        )
+                    continue
+                snapshots.begin(
+                    directory.parts, cursors[directory.parts], total_errors
+                )
+
+            logger.debug("loading '%s'", directory.root)
+
+            # extend the provided list of files that were newly loaded, or at
+            # least have new content
+            new = load_files(
+                cast(List[Pathlike], directory.files),
+                directory.root,
+                (
+                    cursors[directory.parts],
+                    directory.variables,
+                    directory.globals_added,
+                ),
+                loads.file_data,
+                expect_overwrite,
+                are_templates,
+                loads.options,
+                (
+                    results()
+                    if results is not None
+                    else decode_directory(
+                        directory, are_templates, loads.options
+                    )
+                ),
             )
 
-        # extend the provided list of files that were newly loaded, or at
-        # least have new content
-        new = load_files(
-            cast(List[Pathlike], files),
-            root,
+            if new[1]:
+                logger.warning(
+                    "%d errors loading '%s'.", new[1], directory.root
+                )
+            total_errors += new[1]
+
+            if loads.files is not None:
+                loads.files.extend(new[0])
+
+        if snapshots is not None:
+            snapshots.finish(None, cursors, total_errors)
+
+    return LoadResult(existing_data, total_errors == 0)
+
+
+def subtree_snapshots(
+    directories: List[DirectoryLoad],
+    variables: GenericStrDict,
+    expect_overwrite: bool = False,
+    are_templates: bool = True,
+    options: LoadOptions = DEFAULT_OPTIONS,
+) -> Optional[SubtreeSnapshots]:
+    """
+    Set up snapshots of the data loaded from directories (if there's a cache
+    to store them in).
+    """
+
+    if options.parse_cache is None or not directories:
+        return None
+
+    parse_cache = options.parse_cache
+
+    def file_digest(directory: DirectoryLoad, name: str) -> str:
+        """
+        Get a digest of a file (and, when accesses are traced, the variables
+        it accessed when it was last rendered).
+        """
+
+        path = os.path.join(directory.root, name)
+        result = file_hash(path)
+        if options.trace_variables:
+            result += traced_fingerprint(
+                path,
+                file_variables(
+                    path, directory.variables, directory.globals_added
+                ),
+                parse_cache,
+                are_templates,
+                file_variables_hash(path, directory),
+            )
+        return result
+
+    # one snapshot is kept per directory of a tree (loaded a given way), when
+    # accesses are traced files capture the variables they depend on
+    result = SubtreeSnapshots(
+        parse_cache,
+        (
+            str(directories[0].variables_hash)
+            if variables and not options.trace_variables
+            else ""
+        ),
+        f"{directories[0].root}:{int(expect_overwrite)}:{int(are_templates)}",
+    )
+    result.add_digests(
+        [
+            (x.parts, [(name, file_digest(x, name)) for name in x.files])
+            for x in directories
+        ]
+    )
+    return result
+
+
+def restored_files(
+    directory: DirectoryLoad, hashes: Dict[str, GenericStrDict] = None
+) -> List[str]:
+    """
+    Update the hashes of files whose data was restored (instead of loaded),
+    return the files that are new or had hash mismatches.
+    """
+
+    result = []
+    for name in directory.files:
+        full_path = os.path.join(directory.root, name)
+        if hashes is None or set_file_hash(hashes, full_path):
+            result.append(full_path)
+    return result
+
+
+def use_processes(
+    directories: List[DirectoryLoad], options: LoadOptions = DEFAULT_OPTIONS
+) -> bool:
+    """Determine if files should be decoded with processes (or threads)."""
+
+    if options.pool is not LoadPool.AUTO:
+        return options.pool is LoadPool.PROCESS
+
+    size = 0
+    for directory in directories:
+        for name in directory.files:
+            size += os.path.getsize(os.path.join(directory.root, name))
+            if size >= PROCESS_THRESHOLD:
+                return True
+    return False
+
+
+def start_decoding(
+    stack: ExitStack,
+    directories: List[DirectoryLoad],
+    are_templates: bool = True,
+    options: LoadOptions = DEFAULT_OPTIONS,
+    skip: Set[Tuple[str, ...]] = None,
+) -> List[Optional[Callable[[], List[LoadResult]]]]:
+    """
+    Start decoding the files in some directories with a pool of workers (if
+    more than one worker is allowed), except for directories that should be
+    skipped. Return functions that wait for each directory's results.
+    """
+
+    if skip is None:
+        skip = set()
+    if options.workers <= 1 or all(x.parts in skip for x in directories):
+        return [None for _ in directories]
+
+    processes = use_processes(directories, options)
+    pool: Executor
+    if processes:
+        pool = (
+            options.processes
+            if options.processes is not None
+            else stack.enter_context(ProcessPool(options.workers))
+        ).get()
+    else:
+        pool = stack.enter_context(
+            ThreadPoolExecutor(max_workers=options.workers)
+        )
+    return [
+        (
+            decode_files(pool, x, are_templates, options, processes)
+            if x.parts not in skip
+            else None
+        )
+        for x in directories
+    ]
+
+
+def decode_files(
+    pool: Executor,
+    directory: DirectoryLoad,
+    are_templates: bool = True,
+    options: LoadOptions = DEFAULT_OPTIONS,
+    processes: bool = False,
+) -> Callable[[], List[LoadResult]]:
+    """
+    Start decoding the files in a directory with a pool, return a function
+    that waits for their results (in order).
+    """
+
+    files = directory_files(directory)
+
+    # decode individual files with threads
+    if not processes:
+        futures = [
+            pool.submit(
+                decode_file,
+                path,
+                variables,
+                are_templates,
+                options.parse_cache,
+                options.template_cache,
+                options.trace_variables,
+                variables_hash,
+            )
+            for path, variables, variables_hash in files
+        ]
+        return lambda: [x.result() for x in futures]
+
+    # decode chunks of files with processes, which open their own caches
+    chunks: List["Future[bytes]"] = [
+        pool.submit(
+            decode_chunk,
+            [x[0] for x in files[idx : idx + PROCESS_CHUNK]],
+            [x[1] for x in files[idx : idx + PROCESS_CHUNK]],
+            are_templates,
             (
-                advance_dict_by_path(path_list, existing_data),
-                variable_data,
-                added_globals,
+                options.parse_cache.cache_dir
+                if options.parse_cache is not None
+                else None
             ),
-            loads.file_data,
-            expect_overwrite,
-            are_templates,
+            getattr(options.bytecode_cache, "directory", None),
+            options.trace_variables,
+            [x[2] for x in files[idx : idx + PROCESS_CHUNK]],
         )
+        for idx in range(0, len(files), PROCESS_CHUNK)
+    ]
 
-        if new[1]:
-            logger.warning("%d errors loading '%s'.", new[1], root)
-        total_errors += new[1]
+    def wait() -> List[LoadResult]:
+        """Wait for (and de-serialize) the results of each chunk."""
 
-        if loads.files is not None:
-            loads.files.extend(new[0])
+        result: List[LoadResult] = []
+        for chunk in chunks:
+            result.extend(unpack_results(chunk.result()))
+        return result
 
-        if added_globals:
-            del variable_data[GLOBAL_KEY]
+    return wait
 
-    return LoadResult(existing_data, total_errors == 0)
+
+def decode_directory(
+    directory: DirectoryLoad,
+    are_templates: bool = True,
+    options: LoadOptions = DEFAULT_OPTIONS,
+) -> List[LoadResult]:
+    """Decode the files in a directory (in order, without any workers)."""
+
+    return [
+        decode_file(
+            path,
+            variables,
+            are_templates,
+            options.parse_cache,
+            options.template_cache,
+            options.trace_variables,
+            variables_hash,
+        )
+        for path, variables, variables_hash in directory_files(directory)
+    ]
 
 
 def load_dir_only(
@@ -190,28 +635,44 @@ def load_files(
     hashes: Dict[str, GenericStrDict] = None,
     expect_overwrite: bool = False,
     are_templates: bool = True,
+    options: LoadOptions = DEFAULT_OPTIONS,
+    decoded: List[LoadResult] = None,
 ) -> Tuple[List[str], int]:
     """
     Load files into a dictionary and return a list of the files that are
-    new or had hash mismatches.
+    new or had hash mismatches. If the files were already decoded, their
+    data is only melded.
     """
 
     new_or_changed = []
     errors = 0
 
     # load (or meld) data
-    for name in file_paths:
+    for idx, name in enumerate(file_paths):
         name = str(name)
         full_path = os.path.join(root, name)
         assert os.path.isabs(full_path)
-        success = meld_and_resolve(
-            full_path,
-            meld_data[0],
-            meld_data[1],
-            meld_data[2],
-            expect_overwrite,
-            are_templates,
+
+        # meld data that was already decoded (by other workers), in order
+        result = (
+            decoded[idx]
+            if decoded is not None
+            else decode_file(
+                full_path,
+                file_variables(full_path, meld_data[1], meld_data[2]),
+                are_templates,
+                options.parse_cache,
+                options.template_cache,
+                options.trace_variables,
+            )
         )
+        merge(
+            file_data(full_path, meld_data[0]),
+            result.data,
+            expect_overwrite=expect_overwrite,
+        )
+        success = result.success
+
         errors += int(not success)
         if success and hashes is not None:
             success = set_file_hash(hashes, full_path)
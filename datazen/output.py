@@ -0,0 +1,161 @@
+"""
+datazen - APIs for writing the output files that tasks produce.
+"""
+
+# built-in
+import hashlib
+import os
+from typing import BinaryIO, Callable, Iterable, Tuple
+
+# third-party
+from vcorelib.dict import GenericStrDict
+from vcorelib.paths import file_md5_hex
+
+# internal
+from datazen.classes.output_stats import OutputStats
+
+
+def write_if_changed(entry: GenericStrDict, manifest: GenericStrDict) -> bool:
+    """
+    Determine if a target's output should only be written if it changed,
+    targets can override the manifest's setting.
+    """
+
+    return bool(
+        entry.get("write_if_changed", manifest.get("write_if_changed", False))
+    )
+
+
+def write_output(
+    path: str,
+    content: str,
+    mode: str = "w",
+    if_changed: bool = False,
+    stats: OutputStats = None,
+) -> bool:
+    """
+    Write (text) content to an output file, return whether or not the file
+    was written. If requested, files aren't written if their contents
+    wouldn't change and changed files are replaced atomically.
+    """
+
+    if mode != "w" or not if_changed:
+        with open(path, mode, encoding="utf-8") as stream:
+            stream.write(content)
+        if stats is not None:
+            stats.record(len(content.encode("utf-8")), True)
+        return True
+
+    # compare against the bytes that writing in text mode would produce
+    data = content.replace("\n", os.linesep).encode("utf-8")
+    written = not (
+        os.path.isfile(path)
+        and file_md5_hex(path) == hashlib.md5(data).hexdigest()
+    )
+
+    if written:
+        write_stream(path, [content], stats=None)
+
+    if stats is not None:
+        stats.record(len(data), written)
+    return written
+
+
+def create_temporary(path: str) -> Tuple[int, str]:
+    """
+    Create a temporary file next to an output file (with the permissions
+    that creating the output file would give it), return its descriptor and
+    path.
+    """
+
+    while True:
+        temp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+        try:
+            return (
+                os.open(
+                    temp_path,
+                    os.O_CREAT
+                    | os.O_EXCL
+                    | os.O_WRONLY
+                    | getattr(os, "O_BINARY", 0),
+                    0o666,
+                ),
+                temp_path,
+            )
+        except FileExistsError:
+            pass
+
+
+def write_with(
+    path: str,
+    writer: Callable[[BinaryIO], None],
+    mode: str = "w",
+    if_changed: bool = False,
+    stats: OutputStats = None,
+) -> bool:
+    """
+    Write an output file with a function that writes (encoded) content to a
+    binary stream, return whether or not the file was written. Unless
+    appending, content is written to a temporary file and then renamed,
+    optionally only if the result differs from the existing file.
+    """
+
+    if mode != "w":
+        with open(path, "ab") as stream:
+            start = stream.tell()
+            writer(stream)
+            size = stream.tell() - start
+        if stats is not None:
+            stats.record(size, True)
+        return True
+
+    fd, temp_path = create_temporary(path)
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            writer(stream)
+            size = stream.seek(0, os.SEEK_END)
+
+        written = not (
+            if_changed
+            and os.path.isfile(path)
+            and file_md5_hex(path) == file_md5_hex(temp_path)
+        )
+        if written:
+            # replaced files keep their permissions
+            if os.path.isfile(path):
+                os.chmod(temp_path, os.stat(path).st_mode)
+            os.replace(temp_path, path)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+    if stats is not None:
+        stats.record(size, written)
+    return written
+
+
+def write_stream(
+    path: str,
+    chunks: Iterable[str],
+    if_changed: bool = False,
+    stats: OutputStats = None,
+    patch: Callable[[], Tuple[int, str]] = None,
+) -> bool:
+    """
+    Write (text) content to an output file as it's produced, without holding
+    all of it in memory. Once all content is written, an optional patch (an
+    offset in bytes and some text) can overwrite part of it, return whether
+    or not the file was written.
+    """
+
+    def writer(stream: BinaryIO) -> None:
+        """Write chunks of content (and then the patch)."""
+
+        for chunk in chunks:
+            stream.write(chunk.replace("\n", os.linesep).encode("utf-8"))
+        if patch is not None:
+            offset, text = patch()
+            stream.seek(offset)
+            stream.write(text.replace("\n", os.linesep).encode("utf-8"))
+
+    return write_with(path, writer, if_changed=if_changed, stats=stats)
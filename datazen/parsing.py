@@ -3,19 +3,39 @@ datazen - APIs for loading raw data from files.
 """
 
 # built-in
-from contextlib import ExitStack
+from contextlib import ExitStack, contextmanager
+import hashlib
 from io import StringIO
 import logging
+import os
 import time
+from typing import Any, Callable, Dict, Iterator, List, Set
 
 # third-party
 import jinja2
 from vcorelib.dict import GenericDict, GenericStrDict, merge
 from vcorelib.io import ARBITER
 from vcorelib.io.types import DataStream, LoadResult, StreamProcessor
-from vcorelib.paths import Pathlike, file_md5_hex, normalize
+from vcorelib.paths import Pathlike, normalize
+
+# internal
+from datazen.classes.content_hashes import ContentHashes
+from datazen.classes.parse_cache import ParseCache
+from datazen.classes.template_cache import TemplateCache, has_template_syntax
+from datazen.enums import HashPolicy
 
 LOG = logging.getLogger(__name__)
+HASHING: Dict[str, HashPolicy] = {"policy": HashPolicy.STRICT}
+
+# file contents are hashed (at most) once per file identity, per run
+CONTENT_HASHES = ContentHashes()
+
+# compiled templates (for data files) are shared by every load that doesn't
+# provide its own cache
+TEMPLATES = TemplateCache()
+
+# data decoded from files that aren't rendered doesn't depend on variables
+UNRENDERED = "unrendered"
 
 
 def dedup_dict_lists(data: GenericDict) -> GenericDict:
@@ -28,19 +48,45 @@ def dedup_dict_lists(data: GenericDict) -> GenericDict:
         if isinstance(data[key], dict):
             data[key] = dedup_dict_lists(data[key])
         elif isinstance(data[key], list):
-            new_list = []
-            for item in data[key]:
-                if item not in new_list:
-                    new_list.append(item)
-            data[key] = new_list
+            data[key] = dedup_list(data[key])
 
     return data
 
 
+def dedup_list(data: List[Any]) -> List[Any]:
+    """Create a new list without duplicate entries, preserving order."""
+
+    new_list: List[Any] = []
+    seen: Set[Any] = set()
+    for item in data:
+        # fall back to scanning the new list for un-hashable items
+        try:
+            if item in seen:
+                continue
+            seen.add(item)
+        except TypeError:
+            if item in new_list:
+                continue
+        new_list.append(item)
+
+    return new_list
+
+
 def template_preprocessor_factory(
-    variables: GenericStrDict, is_template: bool, stack: ExitStack
+    variables: GenericStrDict,
+    is_template: bool,
+    stack: ExitStack,
+    template_cache: TemplateCache = None,
+    state: GenericStrDict = None,
+    context: Callable[[GenericStrDict], GenericStrDict] = None,
 ) -> StreamProcessor:
-    """Create a stream-processing function for data decoding."""
+    """
+    Create a stream-processing function for data decoding. Templates are
+    rendered with the variables (or a context created from them).
+    """
+
+    if template_cache is None:
+        template_cache = TEMPLATES
 
     def processor(stream: DataStream) -> DataStream:
         """
@@ -50,37 +96,131 @@ def template_preprocessor_factory(
         """
 
         if variables and is_template:
-            template = jinja2.Template(stream.read())
-            stream = stack.enter_context(StringIO(template.render(variables)))
+            source = stream.read()
+
+            # don't compile (or render) content that can't be a template
+            rendered = has_template_syntax(source)
+            if rendered:
+                source = template_cache.get(source).render(
+                    context(variables) if context is not None else variables
+                )
+            stream = stack.enter_context(StringIO(source))
+
+            if state is not None:
+                state["rendered"] = rendered
 
         return stream
 
     return processor
 
 
-def load(
+def parse_cache_key(path: Pathlike, is_template: bool) -> str:
+    """
+    Create the key that data decoded from a file is cached with (only the
+    data most recently decoded from each file is kept).
+    """
+
+    return ParseCache.key(
+        str(normalize(path).resolve()), "decoded", is_template
+    )
+
+
+def parse_cache_variables(
+    variables: GenericStrDict,
+    is_template: bool,
+    rendered: bool,
+    variables_hash: str = None,
+) -> str:
+    """
+    Get the digest of the variables that data decoded from a file depends
+    on. A digest of the variables can be provided if it's already known.
+    """
+
+    if not variables or not is_template:
+        return ""
+
+    # content without template syntax doesn't depend on variables
+    if not rendered:
+        return UNRENDERED
+
+    return (
+        variables_hash if variables_hash is not None else data_md5(variables)
+    )
+
+
+def parse_cache_valid(
+    path: Pathlike,
+    variables: GenericStrDict,
+    is_template: bool,
+    variables_hash: str = None,
+) -> Callable[[Any], bool]:
+    """
+    Create a function that determines if a cache entry (the file's content
+    hash, the digest of its variables and its data) is current.
+    """
+
+    def valid(entry: Any) -> bool:
+        """Determine if a cache entry is current."""
+
+        return (
+            isinstance(entry, list)
+            and len(entry) == 3
+            and entry[0] == file_hash(path)
+            and (
+                entry[1] == UNRENDERED
+                or entry[1]
+                == parse_cache_variables(
+                    variables, is_template, True, variables_hash
+                )
+            )
+        )
+
+    return valid
+
+
+def decode(
     path: Pathlike,
     variables: GenericStrDict,
-    dict_to_update: GenericStrDict,
-    expect_overwrite: bool = False,
     is_template: bool = True,
     logger: logging.Logger = LOG,
+    parse_cache: ParseCache = None,
+    template_cache: TemplateCache = None,
+    context: Callable[[GenericStrDict], GenericStrDict] = None,
+    variables_hash: str = None,
     **kwargs,
 ) -> LoadResult:
     """
-    Load raw file data and meld it into an existing dictionary. Update
-    the result as if it's a template using the provided variables.
+    Decode raw file data (without melding it into anything). Render the file
+    as if it's a template using the provided variables (or a context created
+    from them). A digest of the variables can be provided if it's already
+    known.
     """
 
-    result = LoadResult({}, False)
+    # data that's already been decoded (from identical inputs) is only
+    # retrieved from the cache, extra decoding options bypass it
+    if set(kwargs) - {"require_success"}:
+        parse_cache = None
+    if parse_cache is not None:
+        entry = parse_cache.get(
+            parse_cache_key(path, is_template),
+            parse_cache_valid(path, variables, is_template, variables_hash),
+        )
+        if entry is not None:
+            return LoadResult(entry[2], True)
 
+    state: GenericStrDict = {"rendered": False}
     with ExitStack() as stack:
         try:
             load_result = ARBITER.decode(
                 path,
                 logger,
                 preprocessor=template_preprocessor_factory(
-                    variables, is_template, stack
+                    variables,
+                    is_template,
+                    stack,
+                    template_cache,
+                    state,
+                    context,
                 ),
                 **kwargs,
             )
@@ -91,31 +231,156 @@ def load(
                 exc,
                 variables,
             )
-            return result
+            return LoadResult({}, False)
+
+    if parse_cache is not None and load_result.success:
+        parse_cache.set(
+            parse_cache_key(path, is_template),
+            [
+                file_hash(path),
+                parse_cache_variables(
+                    variables, is_template, state["rendered"], variables_hash
+                ),
+                load_result.data,
+            ],
+        )
+
+    return load_result
+
+
+def load(
+    path: Pathlike,
+    variables: GenericStrDict,
+    dict_to_update: GenericStrDict,
+    expect_overwrite: bool = False,
+    is_template: bool = True,
+    logger: logging.Logger = LOG,
+    parse_cache: ParseCache = None,
+    template_cache: TemplateCache = None,
+    **kwargs,
+) -> LoadResult:
+    """
+    Load raw file data and meld it into an existing dictionary. Update
+    the result as if it's a template using the provided variables.
+    """
 
+    result = decode(
+        path,
+        variables,
+        is_template,
+        logger,
+        parse_cache,
+        template_cache,
+        **kwargs,
+    )
     return LoadResult(
-        merge(
-            dict_to_update, load_result.data, expect_overwrite=expect_overwrite
-        ),
-        load_result.success,
-        load_result.time_ns,
+        merge(dict_to_update, result.data, expect_overwrite=expect_overwrite),
+        result.success,
+        result.time_ns,
     )
 
 
+@contextmanager
+def hash_policy(policy: HashPolicy) -> Iterator[None]:
+    """Use a specific file-change detection policy, in a context."""
+
+    previous = HASHING["policy"]
+    HASHING["policy"] = policy
+    try:
+        yield
+    finally:
+        HASHING["policy"] = previous
+
+
+def file_stat(path: Pathlike) -> List[int]:
+    """Get the identity (modification time, size and inode) of a file."""
+
+    result = os.stat(str(path))
+    return [result.st_mtime_ns, result.st_size, result.st_ino]
+
+
+def file_hash(path: Pathlike) -> str:
+    """Get the hash of a file's contents."""
+
+    path = str(normalize(path))
+    return CONTENT_HASHES.get(path, file_stat(path))
+
+
+def data_md5(data: Any) -> str:
+    """
+    Compute a digest of arbitrary (possibly self-referential) data. Nested
+    containers that refer back to an enclosing container are digested as a
+    reference to it.
+    """
+
+    result = hashlib.md5()
+    active: List[int] = []
+
+    def visit(item: Any) -> None:
+        """Add an item (and anything it contains) to the digest."""
+
+        if not isinstance(item, (dict, list, tuple)):
+            result.update(f"{type(item).__name__}:{item!r};".encode("utf-8"))
+            return
+
+        if id(item) in active:
+            result.update(f"ref:{active.index(id(item))};".encode("utf-8"))
+            return
+
+        active.append(id(item))
+        if isinstance(item, dict):
+            result.update(b"{")
+            for key, value in item.items():
+                visit(key)
+                visit(value)
+            result.update(b"}")
+        else:
+            result.update(b"[")
+            for value in item:
+                visit(value)
+            result.update(b"]")
+        active.pop()
+
+    visit(data)
+    return result.hexdigest()
+
+
 def set_file_hash(
-    hashes: GenericStrDict, path: Pathlike, set_new: bool = True
+    hashes: GenericStrDict,
+    path: Pathlike,
+    set_new: bool = True,
+    policy: HashPolicy = None,
 ) -> bool:
     """Evaluate a hash dictionary and update it on a miss."""
 
+    if policy is None:
+        policy = HASHING["policy"]
+
     path = str(normalize(path))
-    str_hash = file_md5_hex(path)
+    entry = hashes.get(path)
+
+    # the stat is taken before hashing, so a file modified in between is
+    # re-hashed (at the latest) on the next check
+    stat = file_stat(path)
+    if (
+        policy is HashPolicy.TRUST_STAT
+        and entry is not None
+        and entry.get("stat") == stat
+    ):
+        return False
+
+    str_hash = CONTENT_HASHES.get(path, stat)
     result = True
-    if path in hashes and str_hash == hashes[path]["hash"]:
+    if entry is not None and str_hash == entry["hash"]:
         result = False
+        if set_new:
+            entry["stat"] = stat
     elif set_new:
-        if path not in hashes:
-            hashes[path] = {}
-        hashes[path]["hash"] = str_hash
-        hashes[path]["time"] = time.time()
+        if entry is None:
+            entry = {}
+            hashes[path] = entry
+        entry["hash"] = str_hash
+        entry["time"] = time.time()
+        entry["stat"] = stat
 
     return result
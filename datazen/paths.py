@@ -3,13 +3,17 @@ datazen - APIs for working with file paths.
 """
 
 # built-in
+from fnmatch import fnmatchcase
 import os
-from typing import Iterator, List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 
 # third-party
 from vcorelib.dict import GenericStrDict
 from vcorelib.paths import Pathlike, normalize
 
+# internal
+from datazen.classes.listing_cache import ListingCache, scan_dir
+
 FMT_OPEN = "{"
 FMT_CLOSE = "}"
 EXCLUDES = [".git", ".svn", ".gitignore"]
@@ -118,6 +122,24 @@ def advance_dict_by_path(
     return data
 
 
+def get_dict_by_path(
+    path_list: List[str], data: GenericStrDict
+) -> GenericStrDict:
+    """
+    Given a dictionary and a list of directory names, return the child
+    dictionary advanced by each key, in order, from the provided data. Don't
+    add missing keys to the data (return a new, empty dictionary instead).
+    """
+
+    for path in path_list:
+        if path and isinstance(data, dict):
+            if path not in data:
+                return {}
+            data = data[path]
+
+    return data
+
+
 def resolve_dir(data: str, rel_base: str = "") -> str:
     """
     Turn directory data into an absolute path, optionally from a relative
@@ -131,22 +153,60 @@ def resolve_dir(data: str, rel_base: str = "") -> str:
     return os.path.abspath(data)
 
 
-def walk_with_excludes(
-    path: Pathlike, excludes: List[str] = None
-) -> Iterator[Tuple[str, List[str], List[str]]]:
+def excluded(name: str, excludes: Iterable[str]) -> bool:
+    """Determine if a name matches any (glob) exclusion patterns."""
+
+    return any(fnmatchcase(name, pattern) for pattern in excludes)
+
+
+def walk_parts(
+    path: Pathlike,
+    excludes: Iterable[str] = None,
+    listings: ListingCache = None,
+) -> Iterator[Tuple[str, Tuple[str, ...], List[str], List[str]]]:
     """
-    Behaves like os.walk but attempts to skip iterations that would enter
-    directories we want to exclude (and thus not traverse).
+    Walk a directory tree top-down (without following links), yielding each
+    directory's path, its path components relative to the walked directory
+    and its (directory and file) entries. Directories with names that match
+    any of the (glob) exclusion patterns are never entered. Directory
+    listings can be re-used from a cache.
     """
 
     if excludes is None:
         excludes = EXCLUDES
+    excludes = list(excludes)
+
+    to_walk: List[Tuple[str, Tuple[str, ...]]] = [(str(path), ())]
+    while to_walk:
+        root, parts = to_walk.pop()
+        try:
+            listing = (
+                listings.list(root) if listings is not None else scan_dir(root)
+            )
+        except OSError:
+            continue
 
-    for root, dirnames, filenames in os.walk(str(path)):
-        dirs = root.split(os.sep)
+        dirnames = [x for x in listing.dirs if not excluded(x, excludes)]
+        yield root, parts, dirnames, listing.files
 
-        # don't yield any directories that have an excluded path
-        if any(x in dirs for x in excludes):
-            continue
+        # callers can prune directories (in place) before they're walked
+        to_walk.extend(
+            (os.path.join(root, x), parts + (x,))
+            for x in reversed(dirnames)
+            if x not in listing.links
+        )
+
+
+def walk_with_excludes(
+    path: Pathlike,
+    excludes: Iterable[str] = None,
+    listings: ListingCache = None,
+) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    Behaves like os.walk (top-down, without following links) but directories
+    with names that match any of the (glob) exclusion patterns are never
+    entered. Directory listings can be re-used from a cache.
+    """
 
+    for root, _, dirnames, filenames in walk_parts(path, excludes, listings):
         yield root, dirnames, filenames
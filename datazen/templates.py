@@ -3,18 +3,34 @@ datazen - Top-level APIs for loading and interacting with templates.
 """
 
 # built-in
+import hashlib
 import os
-from typing import Dict, Iterable, Type
+import threading
+from typing import Dict, Iterable, List, Set, Tuple, Type
 
 # third-party
 import jinja2
+from jinja2 import nodes
 from vcorelib.dict import GenericStrDict
 from vcorelib.paths import Pathlike, get_file_ext, get_file_name, normalize
 
 # internal
+from datazen import to_private
+from datazen.classes.lazy_templates import LazyTemplates, TemplateSource
+from datazen.classes.parse_cache import ParseCache
 from datazen.load import DEFAULT_LOADS, LoadedFiles
 from datazen.parsing import set_file_hash
 
+# a template reference is either a name for a loader ('name'), a key for the
+# mapping of templates provided to renders ('key') or a reference that can't
+# be determined without rendering ('dynamic')
+TemplateReference = Tuple[str, str]
+DYNAMIC: TemplateReference = ("dynamic", "")
+
+# template references, by the hash of a template's source
+REFERENCES: Dict[str, List[TemplateReference]] = {}
+REFERENCES_LOCK = threading.Lock()
+
 
 def update_cache_primitives(dir_path: str, loads: LoadedFiles) -> None:
     """
@@ -57,27 +73,152 @@ def environment(
 def load(
     template_dirs: Iterable[Pathlike],
     loads: LoadedFiles = DEFAULT_LOADS,
-) -> Dict[str, jinja2.Template]:
+    environments: Dict[Tuple[str, ...], jinja2.Environment] = None,
+) -> LazyTemplates:
     """
     Load jinja2 templates from a list of directories where templates can be
-    found.
+    found. Templates are only compiled when they're first used, and
+    environments can be re-used for identical sets of directories.
     """
 
     templates = [str(normalize(x)) for x in template_dirs]
 
-    # Setup jinja environment.
-    env = environment(
-        loader=jinja2.FileSystemLoader(templates, followlinks=True)
-    )
+    # Setup jinja environment (re-use compiled templates if possible).
+    if environments is None:
+        environments = {}
+    env = environments.get(tuple(templates))
+    if env is None:
+        env = environment(
+            loader=jinja2.FileSystemLoader(templates, followlinks=True),
+            bytecode_cache=loads.options.bytecode_cache,
+        )
+        environments[tuple(templates)] = env
 
     # Manually inspect directories to write into the cache.
     for template_dir in templates:
         update_cache_primitives(template_dir, loads)
 
-    # Load templates into a dictionary.
-    result = {}
+    # Find templates (they're loaded on first use).
+    result = LazyTemplates()
     for template in env.list_templates():
-        key = get_file_name(template)
         assert get_file_ext(template) == "j2"
-        result[key] = env.get_template(template)
+        result.add(get_file_name(template), env, template)
     return result
+
+
+def find_references(ast: nodes.Template) -> List[TemplateReference]:
+    """Find the templates referenced by a parsed template."""
+
+    result: Set[TemplateReference] = set()
+    templates_key = to_private("templates")
+
+    def is_templates(node: nodes.Node) -> bool:
+        """Determine if a node is the mapping of templates."""
+        return isinstance(node, nodes.Name) and node.name == templates_key
+
+    # find templates referenced by name (e.g. 'include', 'extends')
+    for stmt in ast.find_all(
+        (nodes.Extends, nodes.FromImport, nodes.Import, nodes.Include)
+    ):
+        assert isinstance(
+            stmt,
+            (nodes.Extends, nodes.FromImport, nodes.Import, nodes.Include),
+        )
+        names = stmt.template
+        for name in (
+            names.items
+            if isinstance(names, (nodes.List, nodes.Tuple))
+            else [names]
+        ):
+            if isinstance(name, nodes.Const) and isinstance(name.value, str):
+                result.add(("name", name.value))
+            elif not (
+                isinstance(name, (nodes.Getattr, nodes.Getitem))
+                and is_templates(name.node)
+            ):
+                result.add(DYNAMIC)
+
+    # find templates referenced from the mapping of templates
+    for expr in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        assert isinstance(expr, (nodes.Getattr, nodes.Getitem))
+        if is_templates(expr.node):
+            if isinstance(expr, nodes.Getattr):
+                result.add(("key", expr.attr))
+            elif isinstance(expr.arg, nodes.Const) and isinstance(
+                expr.arg.value, str
+            ):
+                result.add(("key", expr.arg.value))
+            else:
+                result.add(DYNAMIC)
+
+    return sorted(result)
+
+
+def template_references(
+    env: jinja2.Environment,
+    source: str,
+    parse_cache: ParseCache = None,
+) -> List[TemplateReference]:
+    """
+    Get the templates referenced by some template source, templates are only
+    parsed once for a given source.
+    """
+
+    source_hash = hashlib.md5(source.encode("utf-8")).hexdigest()
+    with REFERENCES_LOCK:
+        result = REFERENCES.get(source_hash)
+
+    if result is None:
+        key = ParseCache.key(source_hash, "references", True)
+        if parse_cache is not None:
+            result = parse_cache.get(key)
+        if result is None:
+            result = find_references(env.parse(source))
+            if parse_cache is not None:
+                parse_cache.set(key, result)
+        with REFERENCES_LOCK:
+            REFERENCES[source_hash] = result
+
+    return result
+
+
+def template_dependencies(
+    templates: LazyTemplates,
+    root: TemplateSource,
+    parse_cache: ParseCache = None,
+) -> List[str]:
+    """
+    Get the paths to a template and every template that it references
+    (directly or indirectly). If a reference can't be determined, all
+    templates are considered dependencies.
+    """
+
+    result: Dict[str, None] = {}
+    visited: Set[Tuple[int, str]] = set()
+    to_visit: List[TemplateSource] = [root]
+
+    while to_visit:
+        env, name = to_visit.pop()
+        if (id(env), name) in visited:
+            continue
+        visited.add((id(env), name))
+
+        assert env.loader is not None
+        try:
+            source, filename, _ = env.loader.get_source(env, name)
+        except jinja2.TemplateNotFound:
+            continue
+        if filename is not None:
+            result[filename] = None
+
+        for kind, ref in template_references(env, source, parse_cache):
+            if kind == "name":
+                to_visit.append((env, ref))
+            elif kind == "key":
+                if ref in templates:
+                    to_visit.append(templates.source(ref))
+            else:
+                to_visit.extend(templates.source(x) for x in templates)
+                to_visit.extend((env, x) for x in env.list_templates())
+
+    return list(result)
@@ -0,0 +1,88 @@
+"""
+datazen - Tests for the cache-backend classes.
+"""
+
+# built-in
+import os
+from tempfile import TemporaryDirectory
+
+# module under test
+from datazen.classes.cache_backend import (
+    SQLITE_NAME,
+    CacheBackend,
+    JsonCacheBackend,
+    SqliteCacheBackend,
+)
+from datazen.enums import CacheStorage
+from datazen.environment.integrated import from_manifest
+
+
+def test_cache_backend_dirty_rows():
+    """Test that backends only write the rows that changed."""
+
+    for storage in CacheStorage:
+        with TemporaryDirectory() as tdir:
+            backend = CacheBackend.create(tdir, storage)
+            data: dict = {"a": {"a": 1, "b": [1, 2]}, "b": {"a": {"b": "c"}}}
+            assert backend.write(data) == 3
+            assert backend.write(data) == 0
+
+            data["a"]["a"] = 2
+            del data["b"]["a"]
+            assert backend.write(data) == 2
+
+            # a new backend picks up where the last write left off
+            other = CacheBackend.create(tdir, storage)
+            assert other.load() == {"a": {"a": 2, "b": [1, 2]}}
+            assert other.write(data) == 0
+
+            other.clean()
+            assert not os.path.isdir(tdir)
+            assert not CacheBackend.create(tdir, storage).load()
+
+
+def test_cache_backend_sqlite_migrate():
+    """Test that JSON cache data is migrated to a database."""
+
+    with TemporaryDirectory() as tdir:
+        data = {"hashes": {"a": {"b": "c"}}, "meta": {"version": "1.0.0"}}
+        JsonCacheBackend(tdir).write(data)
+
+        backend = SqliteCacheBackend(tdir)
+        assert backend.load() == data
+        assert os.listdir(tdir) == [SQLITE_NAME]
+        assert SqliteCacheBackend(tdir).load() == data
+
+
+def test_cache_backend_malformed():
+    """Test that malformed cache files are skipped."""
+
+    with TemporaryDirectory() as tdir:
+        JsonCacheBackend(tdir).write({"a": {"b": 1}})
+        with open(
+            os.path.join(tdir, "c.json"), "w", encoding="utf-8"
+        ) as stream:
+            stream.write("[1, 2]")
+
+        for backend in [JsonCacheBackend(tdir), SqliteCacheBackend(tdir)]:
+            assert backend.load() == {"a": {"b": 1}}
+
+
+def test_cache_backend_manifest():
+    """Test that a manifest can select a cache backend."""
+
+    with TemporaryDirectory() as tdir:
+        manifest = os.path.join(tdir, "manifest.yaml")
+        with open(manifest, "w", encoding="utf-8") as stream:
+            stream.write("cache_backend: sqlite\ngroups:\n- name: a\n")
+
+        env = from_manifest(manifest)
+        assert env.get_valid()
+        assert env.execute_targets(["groups-a"])
+        assert os.path.isfile(
+            os.path.join(tdir, ".manifest_cache", SQLITE_NAME)
+        )
+        assert os.path.isfile(
+            os.path.join(tdir, ".task_data_cache", SQLITE_NAME)
+        )
+        env.clean_cache()
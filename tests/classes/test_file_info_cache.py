@@ -3,10 +3,12 @@ datazen - Tests for the file-info class.
 """
 
 # built-in
+import os
 from tempfile import TemporaryDirectory
 
 # module under test
 from datazen.classes.file_info_cache import FileInfoCache, copy, meld
+from datazen.classes.task_data_cache import TaskDataCache
 
 
 def test_cache_meld():
@@ -41,3 +43,41 @@ def test_cache_meld():
             time += 1
 
         meld(cache_a, cache_b)
+
+
+def test_cache_journal_recovery():
+    """Test that journaled updates are recovered without a cache write."""
+
+    with TemporaryDirectory() as tdir:
+        cache_dir = os.path.join(tdir, "cache")
+        data_file = os.path.join(tdir, "data.txt")
+        with open(data_file, "w", encoding="utf-8") as stream:
+            stream.write("data")
+
+        cache = FileInfoCache(cache_dir)
+        assert not cache.check_hit("test", data_file)
+        assert cache.journal_updates()
+        assert not cache.journal_updates()
+
+        # simulate an interrupted write
+        assert cache.journal is not None
+        with open(cache.journal.path, "a", encoding="utf-8") as stream:
+            stream.write('{"hashes": ')
+
+        recovered = FileInfoCache(cache_dir)
+        assert recovered.check_hit("test", data_file)
+        assert data_file in recovered.get_loaded("test")
+
+        # writing the cache compacts the journal
+        recovered.write()
+        assert not os.path.isfile(cache.journal.path)
+        assert FileInfoCache(cache_dir).check_hit("test", data_file)
+
+        data_cache = TaskDataCache(os.path.join(tdir, "data"))
+        data_cache.data["compiles"]["a"] = {"a": 1}
+        data_cache.record("compiles", "a")
+        data_cache.record("compiles", "b")
+        recovered_data = TaskDataCache(os.path.join(tdir, "data"))
+        assert recovered_data.data["compiles"]["a"] == {"a": 1}
+        assert "b" not in recovered_data.data["compiles"]
+        data_cache.clean()
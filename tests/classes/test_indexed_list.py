@@ -0,0 +1,66 @@
+"""
+datazen - Tests for the indexed-list class.
+"""
+
+# built-in
+from copy import deepcopy
+import pickle
+import time
+
+# module under test
+from datazen.classes.file_info_cache import FileInfoCache, cmp_loaded_count
+from datazen.classes.indexed_list import IndexedList
+
+
+def test_indexed_list_basic():
+    """Test that the index stays consistent with the list's contents."""
+
+    data = IndexedList(["a", "b", "a"])
+    assert data.count("a") == 2
+    assert "b" in data and "c" not in data
+
+    data.append("c")
+    data.extend(["c", "d"])
+    data += ["e"]
+    data.insert(0, "f")
+    assert data == ["f", "a", "b", "a", "c", "c", "d", "e"]
+    assert data.count("c") == 2
+
+    data.remove("a")
+    assert data.pop() == "e"
+    assert "e" not in data
+    del data[0]
+    data[0] = "x"
+    assert data == ["x", "a", "c", "c", "d"]
+    assert "b" not in data and data.count("x") == 1
+
+    data *= 2
+    assert data.count("c") == 4
+
+    # copies have their own (equal) index
+    for other in [deepcopy(data), pickle.loads(pickle.dumps(data))]:
+        assert isinstance(other, IndexedList)
+        assert other == data and other.counts == data.counts
+
+    data.clear()
+    assert not data and not data.counts
+
+
+def test_cmp_loaded_count_scaling():
+    """Test that comparing loaded-file counts scales linearly."""
+
+    durations = []
+    for size in [1000, 10000, 100000]:
+        cache_a = FileInfoCache()
+        cache_b = FileInfoCache()
+        cache_a.get_loaded("test").extend(f"file_{x}" for x in range(size))
+        cache_b.get_loaded("test").extend(
+            f"file_{x}" for x in range(size // 2, size + (size // 2))
+        )
+
+        start = time.perf_counter()
+        assert cmp_loaded_count(cache_a, cache_b, "test") == size
+        durations.append(time.perf_counter() - start)
+
+    # a quadratic comparison would take ~10,000x longer for 100x the files
+    assert durations[-1] < 1000 * max(durations[0], 1e-3)
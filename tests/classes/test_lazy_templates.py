@@ -0,0 +1,45 @@
+"""
+datazen - Tests for the lazy-templates class.
+"""
+
+# built-in
+from copy import copy
+
+# third-party
+import jinja2
+from pytest import raises
+
+# module under test
+from datazen.classes.lazy_templates import LazyTemplates
+
+
+def test_lazy_templates():
+    """Test that templates are only loaded when they're accessed."""
+
+    loader = jinja2.DictLoader({"a.j2": "a: {{a}}", "b.j2": "{{ b"})
+    env = jinja2.Environment(loader=loader)
+
+    templates = LazyTemplates()
+    templates.add("a", env, "a.j2")
+    templates.add("b", env, "b.j2")
+    assert len(templates) == 2 and "a" in templates
+    assert not templates.loaded
+
+    assert templates["a"].render(a=1) == "a: 1"
+    assert list(templates.loaded) == ["a"]
+
+    # copies and updates don't load anything
+    other = copy(templates)
+    other.update({"c": env.from_string("c")})
+    assert set(other) == {"a", "b", "c"}
+    assert other.sources.keys() == {"b"}
+    assert "c" not in templates
+
+    # errors surface on access, the template can still be found after
+    with raises(jinja2.TemplateSyntaxError):
+        assert templates["b"]
+    assert "b" in templates
+
+    del templates["a"]
+    del templates["b"]
+    assert not templates
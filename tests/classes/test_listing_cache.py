@@ -0,0 +1,55 @@
+"""
+datazen - Tests for the 'ListingCache' class.
+"""
+
+# built-in
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# module under test
+from datazen.classes import listing_cache
+from datazen.classes.listing_cache import ListingCache
+
+
+def test_listing_cache():
+    """Test that directory listings are re-used until directories change."""
+
+    original = listing_cache.RACY_NS
+    listing_cache.RACY_NS = 0
+    try:
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir, "root")
+            root.joinpath("a").mkdir(parents=True)
+            root.joinpath("b.yaml").write_text("---\n", encoding="utf-8")
+            path = str(Path(tmpdir, "listings.json"))
+
+            cache = ListingCache(path)
+            listing = cache.list(str(root))
+            assert listing.dirs == ["a"]
+            assert listing.files == ["b.yaml"]
+            cache.write()
+
+            # listings are loaded from disk
+            cache = ListingCache(path)
+            assert cache.list(str(root)) == listing
+            assert cache.describe() == "1 hit(s), 0 miss(es)"
+
+            # new entries change the directory's modification time
+            root.joinpath("c.yaml").write_text("---\n", encoding="utf-8")
+            os.utime(root, ns=(0, 0))
+            assert sorted(cache.list(str(root)).files) == ["b.yaml", "c.yaml"]
+            assert cache.misses == 1
+    finally:
+        listing_cache.RACY_NS = original
+
+
+def test_listing_cache_racy():
+    """Test that listings of recently-modified directories aren't cached."""
+
+    with TemporaryDirectory() as tmpdir:
+        cache = ListingCache()
+        cache.list(tmpdir)
+        cache.list(tmpdir)
+        assert cache.misses == 2
+        assert not cache.data
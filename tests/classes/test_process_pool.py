@@ -0,0 +1,28 @@
+"""
+datazen - Tests for the 'ProcessPool' class.
+"""
+
+# built-in
+import os
+
+# module under test
+from datazen.classes.process_pool import ProcessPool
+
+
+def test_process_pool():
+    """Test that worker processes are only started when they're used."""
+
+    pool = ProcessPool(1)
+    pool.shutdown()
+    assert pool.starts == 0
+
+    with pool:
+        executor = pool.get()
+        assert pool.get() is executor
+        assert executor.submit(os.getpid).result() != os.getpid()
+    assert pool.executor is None
+
+    # the pool can be started again after it's stopped
+    assert pool.get() is not executor
+    assert pool.starts == 2
+    pool.shutdown()
@@ -0,0 +1,75 @@
+"""
+datazen - Tests for the 'SubtreeSnapshots' class.
+"""
+
+# built-in
+import os
+from tempfile import TemporaryDirectory
+
+# module under test
+from datazen.classes.parse_cache import ParseCache
+from datazen.classes.subtree_snapshots import SubtreeSnapshots, within
+
+
+def test_subtree_digests():
+    """Test that subtree digests reflect their contents and structure."""
+
+    assert within(("a", "b"), ("a",))
+    assert within(("a",), ())
+    assert not within(("a",), ("a", "b"))
+
+    with TemporaryDirectory() as tmpdir:
+
+        def digests(salt: str, order: list, file_digest: str = "x") -> dict:
+            """Compute digests for the tree (with some directory order)."""
+
+            snapshots = SubtreeSnapshots(ParseCache(tmpdir), salt)
+            snapshots.add_digests(
+                [((), [])] + [((x,), [("x.yaml", file_digest)]) for x in order]
+            )
+            return snapshots.digests
+
+        result = digests("", ["a", "b"])
+
+        # identical directories have identical digests
+        assert result[("a",)] == result[("b",)]
+        assert result == digests("", ["a", "b"])
+
+        # the root digest depends on the salt and the order of directories
+        assert result[()] != digests("salt", ["a", "b"])[()]
+        assert result[()] != digests("", ["b", "a"])[()]
+        assert result[()] != digests("", ["a"])[()]
+
+        # digests depend on the digests of files
+        assert result[("a",)] != digests("", ["a", "b"], "y")[("a",)]
+
+
+def test_subtree_snapshots_replaced():
+    """Test that only one snapshot is kept for each directory."""
+
+    with TemporaryDirectory() as tmpdir:
+        cache = ParseCache(tmpdir)
+
+        def snapshots(value: int) -> SubtreeSnapshots:
+            """Create snapshots for a tree with some file content."""
+
+            result = SubtreeSnapshots(cache, name="tree")
+            result.add_digests([((), [("a.yaml", str(value))])])
+            return result
+
+        for value in range(3):
+            data: dict = {}
+            assert not snapshots(value).restore((), data)
+
+            loaded = snapshots(value)
+            loaded.begin((), data, 0)
+            data["a"] = value
+            loaded.finish(None, {(): data}, 0)
+
+        # previous snapshots were replaced (and aren't restored)
+        assert len(os.listdir(tmpdir)) == 1
+        data = {}
+        assert snapshots(2).restore((), data)
+        assert data == {"a": 2}
+        data = {}
+        assert not snapshots(0).restore((), data)
@@ -0,0 +1,55 @@
+"""
+datazen - Tests for the task-graph class.
+"""
+
+# built-in
+from threading import Lock
+
+# module under test
+from datazen.classes.task_graph import TaskGraph
+from datazen.environment.base import Task, TaskResult
+
+
+def test_task_graph_execute():
+    """Test that tasks are only executed after their dependencies."""
+
+    deps = {
+        Task("groups", "all"): [Task("renders", "a"), Task("renders", "b")],
+        Task("renders", "a"): [Task("compiles", "a")],
+        Task("renders", "b"): [Task("compiles", "a"), Task("renders", "b")],
+    }
+    graph = TaskGraph.build(Task("groups", "all"), lambda x: deps.get(x, []))
+    assert len(graph.dependencies) == 4
+    assert graph.cycle() is None
+
+    order = []
+    lock = Lock()
+
+    def handle(task: Task) -> TaskResult:
+        """Record the order that tasks were executed in."""
+
+        with lock:
+            for dep in deps.get(task, []):
+                assert dep == task or dep in order
+            order.append(task)
+        return TaskResult(True, True)
+
+    assert graph.execute(handle, 4)
+    assert order[-1] == Task("groups", "all")
+    assert len(order) == 4
+    assert all(x.success for x in graph.results.values())
+
+
+def test_task_graph_failures():
+    """Test that failures and cycles prevent dependent tasks from running."""
+
+    graph = TaskGraph()
+    graph.add(Task("groups", "a"), [Task("commands", "false")])
+    assert not graph.execute(lambda x: TaskResult(x.name != "false", False))
+    assert Task("groups", "a") not in graph.results
+
+    graph = TaskGraph()
+    graph.add(Task("groups", "a"), [Task("groups", "b")])
+    graph.add(Task("groups", "b"), [Task("groups", "a")])
+    assert graph.cycle() is not None
+    assert not graph.execute(lambda _: TaskResult(True, False), 2)
@@ -0,0 +1,41 @@
+"""
+datazen - Tests for the template-cache classes.
+"""
+
+# built-in
+import os
+from tempfile import TemporaryDirectory
+
+# module under test
+from datazen.classes.template_cache import (
+    BytecodeCache,
+    TemplateCache,
+    has_template_syntax,
+)
+
+
+def test_template_cache():
+    """Test that identical template sources are only compiled once."""
+
+    with TemporaryDirectory() as tdir:
+        bytecode_dir = os.path.join(tdir, "bytecode")
+        cache = TemplateCache(BytecodeCache(bytecode_dir))
+
+        template = cache.get("a: {{a}}")
+        assert template.render({"a": 1}) == "a: 1"
+        assert cache.get("a: {{a}}") is template
+        assert cache.get("b: {{a}}") is not template
+        assert len(os.listdir(bytecode_dir)) == 2
+
+        # a new cache can re-use compiled bytecode
+        other = TemplateCache(BytecodeCache(bytecode_dir))
+        assert other.get("a: {{a}}").render({"a": 2}) == "a: 2"
+
+
+def test_has_template_syntax():
+    """Test detection of template syntax."""
+
+    assert not has_template_syntax("a: 1\nb: {c: d}\n")
+    assert has_template_syntax("a: {{a}}")
+    assert has_template_syntax("{% if a %}a: 1{% endif %}")
+    assert has_template_syntax("{# comment #}")
@@ -0,0 +1,60 @@
+"""
+datazen - Tests for the 'TracedData' class.
+"""
+
+# third-party
+from pytest import raises
+
+# module under test
+from datazen import GLOBAL_KEY
+from datazen.classes.traced_data import (
+    MISSING,
+    TracedData,
+    trace_context,
+    traced_changes,
+)
+
+
+def test_traced_data_accesses():
+    """Test that accessed values are recorded."""
+
+    data: dict = {"a": {"b": 1, "c": [1, 2]}, "d": {"e": {"f": 1}}}
+    accesses: dict = {}
+    traced = TracedData(data, (), accesses)
+
+    assert traced["a"]["b"] == 1
+    assert ("a", "b") in accesses
+    assert ("a",) not in accesses
+
+    assert traced["a"].get("missing") is None
+    assert accesses[("a", "missing")] == MISSING
+    with raises(KeyError):
+        assert traced["missing"]
+
+    assert dict(traced["d"]["e"]) == {"f": 1}
+    assert ("d", "e") in accesses
+
+    records = [[list(x), y] for x, y in accesses.items()]
+    assert traced_changes(records, data) == 0
+
+    data["a"]["c"].append(3)
+    assert traced_changes(records, data) == 0
+
+    data["a"]["b"] = 2
+    data["a"]["missing"] = 1
+    del data["d"]
+    assert traced_changes(records, data) == 4
+
+
+def test_trace_context():
+    """Test creating a render context that records accesses."""
+
+    data: dict = {"a": 1, "b": {"c": 1}}
+    accesses: dict = {}
+    context = trace_context(data, accesses)
+
+    assert list(accesses) == [("a",)]
+    assert context[GLOBAL_KEY]["b"]["c"] == 1
+    assert ("b", "c") in accesses
+    assert str(context["b"]) == str({"c": 1})
+    assert ("b",) in accesses
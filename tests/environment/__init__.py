@@ -4,7 +4,7 @@ datazen - A testing environment class for aggregating commonly used test data.
 
 # built-in
 import os
-from typing import Dict
+from typing import Mapping
 
 # third-party
 import jinja2
@@ -48,7 +48,9 @@ class EnvironmentMock:
         env = self.valid if valid else self.invalid
         return env.cached_load_schemas(require_all)
 
-    def get_templates(self, valid: bool = True) -> Dict[str, jinja2.Template]:
+    def get_templates(
+        self, valid: bool = True
+    ) -> Mapping[str, jinja2.Template]:
         """Attempt to load one of the sets of templates."""
 
         env = self.valid if valid else self.invalid
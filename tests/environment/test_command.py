@@ -9,7 +9,12 @@ from vcorelib.task.subprocess.run import is_windows
 from datazen.environment.integrated import from_manifest
 
 # internal
-from ..resources import get_resource, scoped_environment
+from ..resources import (
+    get_resource,
+    get_scenario_manifest,
+    scoped_environment,
+    scoped_scenario,
+)
 
 
 def test_command_duplicate_matches():
@@ -41,3 +46,21 @@ def test_command_basic():
             env.write_cache()
             new_env = from_manifest(get_resource("manifest.yaml", True))
             assert new_env.command("a") == (True, False)
+
+
+def test_command_early_cutoff():
+    """
+    Test that a dependency producing the same data doesn't cause its
+    dependents to run again.
+    """
+
+    if is_windows():
+        return
+
+    with scoped_scenario("early_cutoff") as env:
+        assert env.command("dependent") == (True, True)
+        env.write_cache()
+
+        new_env = from_manifest(str(get_scenario_manifest("early_cutoff")))
+        assert new_env.command("dependent") == (True, False)
+        assert new_env.command("same") == (True, False)
@@ -2,11 +2,20 @@
 datazen - Tests for the 'CompileEnvironment' class mixin.
 """
 
+# built-in
+from copy import deepcopy
+
 # module under test
-from datazen.environment.base import TaskResult
+from datazen.environment import copy_for_merge
+from datazen.environment.base import TaskResult, namespace_signature
+from datazen.environment.integrated import from_manifest
 
 # internal
-from ..resources import scoped_environment, scoped_scenario
+from ..resources import (
+    get_scenario_manifest,
+    scoped_environment,
+    scoped_scenario,
+)
 
 
 def test_compile_overrides():
@@ -24,3 +33,60 @@ def test_ini_basic():
         for key in "abc":
             assert env.compile(f"single-{key}").success
         assert not env.compile("bad").success
+
+        # targets that load the same directories share a namespace
+        assert env.namespaces_shared == 2
+        assert "2 re-used" in env.describe_namespaces()
+
+
+def test_compile_shared_data():
+    """Test that compiles don't modify (shared) namespace data."""
+
+    with scoped_environment() as env:
+        configs = deepcopy(env.cached_load_configs()[0])
+        assert env.group("compile-test") == TaskResult(True, True)
+        assert env.cached_load_configs()[0] == configs
+
+
+def test_copy_for_merge():
+    """Test copying data so that it can be merged into."""
+
+    data: dict = {"a": {"b": [1], "c": {"d": 1}}, "e": {"f": 1}}
+    result = copy_for_merge(data, {"a": {"b": [2]}})
+    assert result["a"] is not data["a"]
+    assert result["a"]["b"] is not data["a"]["b"]
+    assert result["a"]["c"] is data["a"]["c"]
+    assert result["e"] is data["e"]
+
+
+def test_namespace_signature():
+    """Test that equivalent directory lists produce the same signature."""
+
+    assert namespace_signature(
+        {"configs": ["a/../b", "b", "c"]}
+    ) == namespace_signature({"configs": ["b", "c"], "templates": []})
+    assert namespace_signature({"configs": ["b", "c"]}) != (
+        namespace_signature({"configs": ["c", "b"]})
+    )
+
+
+def test_compile_task_inputs():
+    """Test that compiles only consider changes to their own input files."""
+
+    manifest = get_scenario_manifest("task_inputs")
+    new_config = manifest.parent.joinpath("b_configs", "new.yaml")
+
+    with scoped_scenario("task_inputs") as env:
+        assert env.compile("a") == TaskResult(True, True)
+        assert env.compile("b") == TaskResult(True, True)
+        env.write_cache()
+
+        try:
+            with new_config.open("w", encoding="utf-8") as stream:
+                stream.write("---\nc: 1\n")
+
+            env = from_manifest(str(manifest))
+            assert env.compile("b") == TaskResult(True, True)
+            assert env.compile("a") == TaskResult(True, False)
+        finally:
+            new_config.unlink()
@@ -95,6 +95,21 @@ def test_operations():
         assert env.render("e") == (False, False)
 
 
+def test_operations_parallel():
+    """Test that executing targets on multiple workers is consistent."""
+
+    with scoped_environment() as env:
+        logger = env.logger
+        assert env.execute("groups-compile-test", jobs=4) == (True, True)
+        assert env.execute("groups-compile-test", jobs=4) == (True, False)
+        assert env.execute("groups-test", jobs=4) == (True, True)
+        assert env.execute("renders-xx", jobs=4) == (False, False)
+        assert env.execute_targets(["groups-test-children"], jobs=4)
+
+        # tasks (handled concurrently) don't replace the environment's logger
+        assert env.logger is logger
+
+
 def test_load_manifest():
     """Test a nominal manifest-loading scenario."""
 
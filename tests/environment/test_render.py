@@ -3,13 +3,21 @@ datazen - Tests for the 'RenderEnvironment' class mixin.
 """
 
 # built-in
+import json
 import os
 
 # module under test
+from datazen.classes.task_data_cache import TRACED_KEY
 from datazen.environment.integrated import from_manifest
 
 # internal
-from ..resources import get_resource, injected_content, scoped_environment
+from ..resources import (
+    get_resource,
+    get_scenario_manifest,
+    injected_content,
+    scoped_environment,
+    scoped_scenario,
+)
 
 
 def test_render_simple():
@@ -24,6 +32,15 @@ def test_render_simple():
         assert new_env.render("test.py") == (True, False)
 
 
+def test_render_journal():
+    """Test that completed renders are recovered from the cache journal."""
+
+    with scoped_environment() as env:
+        assert env.render("test.md") == (True, True)
+        new_env = from_manifest(get_resource("manifest.yaml", True))
+        assert new_env.render("test.md") == (True, False)
+
+
 def test_render_children():
     """
     Test render targets used to validate behavior of the 'children' key.
@@ -80,3 +97,98 @@ def test_render_common_template_dep():
             assert new_env.group("render_test") == (True, False)
 
             new_env.restore_cache()
+
+
+def test_render_traced():
+    """Test that traced renders only consider the data they access."""
+
+    manifest = get_scenario_manifest("traced_renders")
+    configs = manifest.parent.joinpath("configs")
+    other = configs.joinpath("other.yaml")
+    values = configs.joinpath("values.yaml")
+    original = values.read_text(encoding="utf-8")
+
+    with scoped_scenario("traced_renders") as env:
+        assert env.render("a.txt") == (True, True)
+        assert env.render("b.txt") == (True, True)
+        env.write_cache()
+
+        try:
+            # changing data that isn't accessed doesn't require a render
+            other.write_text("---\nvalue: 2\n", encoding="utf-8")
+            env = from_manifest(str(manifest))
+            assert env.render("a.txt") == (True, False)
+            assert env.render("b.txt") == (True, False)
+            env.write_cache()
+
+            # only the render that accesses changed data is performed
+            values.write_text(
+                original.replace("b: 2", "b: 3"), encoding="utf-8"
+            )
+            env = from_manifest(str(manifest))
+            assert env.render("a.txt") == (True, False)
+            assert env.render("b.txt") == (True, True)
+        finally:
+            other.write_text("---\nvalue: 1\n", encoding="utf-8")
+            values.write_text(original, encoding="utf-8")
+
+
+def test_render_traced_global():
+    """Test that traced renders accessing all of the data are skipped."""
+
+    manifest = get_scenario_manifest("traced_renders")
+    with scoped_scenario("traced_renders") as env:
+        assert env.render("d.txt") == (True, True)
+        env.write_cache()
+        env = from_manifest(str(manifest))
+        assert env.render("d.txt") == (True, False)
+
+
+def test_render_traced_untraceable():
+    """Test that renders using data in ways that can't be traced succeed."""
+
+    with scoped_scenario("traced_renders") as env:
+        assert env.render("c.json") == (True, True)
+        out = get_scenario_manifest("traced_renders").parent.joinpath(
+            "datazen-out", "c.json"
+        )
+        assert json.loads(out.read_text(encoding="utf-8")) == {"a": 1, "b": 2}
+
+        # nothing is recorded, so the render is always performed
+        assert "renders-c.json" not in env.task_data[TRACED_KEY]
+        env.write_cache()
+        env = from_manifest(str(get_scenario_manifest("traced_renders")))
+        assert env.render("c.json") == (True, True)
+
+
+def test_render_streamed():
+    """Test that streamed renders produce the same output as other renders."""
+
+    with scoped_scenario("streamed_renders") as env:
+        for name in ["buffered", "streamed"]:
+            assert env.render(f"{name}.md") == (True, True)
+            assert env.render(f"{name}-indent.yaml") == (True, True)
+
+        out = get_scenario_manifest("streamed_renders").parent.joinpath(
+            "datazen-out"
+        )
+        for name in ["{}.md", "{}-indent.yaml"]:
+            buffered = out.joinpath(name.format("buffered")).read_bytes()
+            assert b"# 4 rows\n\n" in buffered
+            streamed = out.joinpath(name.format("streamed")).read_bytes()
+            assert buffered == streamed
+
+        # streamed renders only store the hash of their output
+        assert "streamed_md_hash" in env.task_data["renders"]["streamed.md"]
+
+        # output that's captured isn't streamed
+        buffered = out.joinpath("buffered.md").read_bytes()
+        assert env.render("captured.md") == (True, True)
+        captured = env.task_data["renders"]["captured.md"]["captured"]
+        assert captured.startswith("# 4 rows")
+        assert out.joinpath("captured.md").read_bytes() == buffered
+
+        assert env.render("parent.md") == (True, True)
+        assert env.task_data["renders"]["child"]["child"] == captured
+        assert out.joinpath("child.md").read_bytes() == buffered
+        assert captured in out.joinpath("parent.md").read_text("utf-8")
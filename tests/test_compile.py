@@ -0,0 +1,50 @@
+"""
+datazen - Tests for the 'compile' API.
+"""
+
+# built-in
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# module under test
+from datazen.classes.output_stats import OutputStats
+from datazen.compile import file_compile, str_compile
+
+
+def test_file_compile():
+    """Test compiling data directly to output files."""
+
+    data = {"a": [1, 2, 3], "b": {"c": "d"}}
+    stats = OutputStats()
+
+    with TemporaryDirectory() as tmpdir:
+        for data_type in ["json", "yaml"]:
+            path = Path(tmpdir, f"out.{data_type}")
+            expected = str_compile(data, data_type)
+
+            written, size, time_ns = file_compile(
+                data, data_type, str(path), if_changed=True, stats=stats
+            )
+            assert written
+            assert time_ns >= 0
+            assert path.read_text(encoding="utf-8") == expected
+            assert size == path.stat().st_size
+
+            # unchanged output isn't written again
+            assert not file_compile(
+                data, data_type, str(path), if_changed=True, stats=stats
+            )[0]
+
+            # appending adds to the existing file
+            assert file_compile(data, data_type, str(path), "a")[1] == size
+            assert path.read_text(encoding="utf-8") == expected * 2
+
+        assert sorted(os.listdir(tmpdir)) == ["out.json", "out.yaml"]
+
+    assert stats.written == 2
+    assert stats.skipped == 2
+
+    stats.record_encode("a", 1000, 1000)
+    assert stats.throughput("a") == 1e9
+    assert stats.throughput("b") == 0.0
@@ -0,0 +1,114 @@
+"""
+datazen - Test the 'decoding' module.
+"""
+
+# built-in
+import datetime
+import logging
+from logging.handlers import BufferingHandler
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+# third-party
+from vcorelib.io.types import LoadResult
+
+# module under test
+from datazen.classes.parse_cache import ParseCache
+from datazen.decoding import (
+    MARSHAL,
+    PICKLE,
+    decode_file,
+    decode_traced,
+    pack_results,
+    traced_fingerprint,
+    traced_key,
+    unpack_results,
+)
+
+
+def test_pack_results():
+    """Test serializing decoded data (and logged messages)."""
+
+    handler = BufferingHandler(10)
+    logging.getLogger("datazen").addHandler(handler)
+    try:
+        results = [LoadResult({"a": [1, 2.0, None]}, True, 5)]
+        data = pack_results(results, [("datazen", logging.ERROR, "a message")])
+        assert data.startswith(MARSHAL)
+        assert unpack_results(data) == results
+    finally:
+        logging.getLogger("datazen").removeHandler(handler)
+    assert [x.getMessage() for x in handler.buffer] == ["a message"]
+
+    # data that 'marshal' can't serialize is pickled
+    value: Any = datetime.date(2020, 1, 1)
+    results = [LoadResult({"a": value}, False, 5)]
+    data = pack_results(results, [])
+    assert data.startswith(PICKLE)
+    assert unpack_results(data) == results
+
+
+def test_decode_traced():
+    """Test that files are only rendered again when accessed data changes."""
+
+    with TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir, "a.yaml"))
+        Path(path).write_text("---\na: '{{global.b.c}}'\n", "utf-8")
+        cache = ParseCache(str(Path(tmpdir, "cache")))
+
+        variables = {"b": {"c": 1, "d": 2}, "e": {"f": 3}}
+        assert traced_fingerprint(path, variables, cache).startswith("all:")
+        assert decode_traced(path, variables, cache).data == {"a": "1"}
+        fingerprint = traced_fingerprint(path, variables, cache)
+        assert fingerprint.startswith("some:")
+
+        # data that wasn't accessed doesn't matter
+        hits = cache.hits
+        variables = {"b": {"c": 1, "d": 4}}
+        assert decode_traced(path, variables, cache).data == {"a": "1"}
+        assert cache.hits == hits + 1
+        assert traced_fingerprint(path, variables, cache) == fingerprint
+
+        # data that was accessed does
+        variables = {"b": {"c": 5, "d": 4}}
+        assert traced_fingerprint(path, variables, cache) != fingerprint
+        assert decode_file(path, variables, True, cache, trace=True).data == {
+            "a": "5"
+        }
+
+        # files that aren't templates don't depend on any variables
+        assert not traced_fingerprint(path, variables, cache, False)
+
+
+def test_decode_traced_identical():
+    """
+    Test that files with identical content (rendered from different values)
+    don't share decoded data.
+    """
+
+    with TemporaryDirectory() as tmpdir:
+        cache = ParseCache(str(Path(tmpdir, "cache")))
+        paths = []
+        for name in ["a", "b"]:
+            Path(tmpdir, name).mkdir()
+            paths.append(str(Path(tmpdir, name, "x.yaml")))
+            Path(paths[-1]).write_text("---\na: '{{global.b}}'\n", "utf-8")
+
+        for _ in range(2):
+            for path, value in zip(paths, [1, 2]):
+                assert decode_traced(path, {"b": value}, cache).data == {
+                    "a": str(value)
+                }
+        entry = cache.get(traced_key(paths[1]))
+
+        # each file's accesses (and data) are kept
+        hits = cache.hits
+        assert decode_traced(paths[0], {"b": 1}, cache).data == {"a": "1"}
+        assert decode_traced(paths[1], {"b": 2}, cache).data == {"a": "2"}
+        assert cache.hits == hits + 2
+
+        # data is always paired with the accesses of the render producing it
+        cache.set(traced_key(paths[0]), entry)
+        assert decode_traced(paths[0], {"b": 1}, cache).data == {"a": "1"}
+        assert decode_traced(paths[0], {"b": 2}, cache).data == {"a": "2"}
@@ -46,6 +46,9 @@ def test_entry():
     assert datazen_main(args + ["-c"]) == 0
     assert datazen_main(args + ["a", "b", "c"]) == 0
     assert datazen_main(args + ["-c"]) == 0
+    assert datazen_main(args + ["-j", "4", "a", "b", "c"]) == 0
+    assert datazen_main(args + ["--hash-policy", "trust-stat"]) == 0
+    assert datazen_main(args + ["-c"]) == 0
     assert datazen_main(args + ["not_a_target"]) != 0
     assert datazen_main(args + ["--sync", "-d"]) == 0
     assert datazen_main([PKG_NAME, "-C", manifest_dir, "a", "b", "c"]) == 0
@@ -2,8 +2,32 @@
 datazen - Test the 'load' module.
 """
 
+# built-in
+from copy import deepcopy
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+
 # module under test
-from datazen.load import data_added
+from datazen import GLOBAL_KEY
+from datazen.classes.parse_cache import ParseCache
+from datazen.classes.process_pool import ProcessPool
+from datazen.enums import LoadPool
+from datazen.load import (
+    LoadedFiles,
+    LoadOptions,
+    data_added,
+    directory_loads,
+    file_variables,
+    file_variables_hash,
+    load_dir,
+    use_processes,
+)
+from datazen.paths import get_dict_by_path, get_path_list, walk_with_excludes
+
+# internal
+from tests.resources import get_test_configs, get_test_variables
 
 
 def test_data_added():
@@ -11,3 +35,270 @@ def test_data_added():
 
     with data_added("a", 1) as data:
         assert data["a"] == 1
+
+
+def test_file_variables():
+    """Test that file variables are resolved without modifying variables."""
+
+    variables = {"a": {"b": 1}, GLOBAL_KEY: {"c": 2}}
+    original = deepcopy(variables)
+
+    assert file_variables("a.yaml", variables) is variables["a"]
+    assert file_variables("a.yaml", variables, True) == {
+        "b": 1,
+        GLOBAL_KEY: {"c": 2},
+    }
+    assert file_variables("b.yaml", variables, True) is variables
+    assert file_variables(".yaml", variables, True) is variables
+    assert variables == original
+
+
+def test_directory_variables_hash():
+    """Test that variables are digested once per directory."""
+
+    with TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "data", "a").mkdir(parents=True)
+        options = LoadOptions(ParseCache(str(Path(tmpdir, "cache"))))
+
+        def hashes(variables: dict) -> dict:
+            """Get the variables digest for each directory."""
+
+            return {
+                x.parts: x.variables_hash
+                for x in directory_loads(
+                    Path(tmpdir, "data"), variables, options=options
+                )
+            }
+
+        result = hashes({"a": {"b": 1}, "c": 2})
+        assert all(result.values())
+        assert result == hashes({"a": {"b": 1}, "c": 2})
+
+        # changes to (global) variables change every directory's digest
+        changed = hashes({"a": {"b": 1}, "c": 3})
+        assert all(changed[x] != result[x] for x in result)
+
+        # files with their own variables have their own digest
+        directory = next(
+            directory_loads(
+                Path(tmpdir, "data"), {"a": {"b": 1}}, options=options
+            )
+        )
+        assert file_variables_hash("b.yaml", directory) == (
+            directory.variables_hash
+        )
+        assert file_variables_hash("a.yaml", directory) not in {
+            None,
+            directory.variables_hash,
+        }
+
+        # nothing is digested if decoded data isn't cached
+        assert not any(
+            x.variables_hash for x in directory_loads(Path(tmpdir), {})
+        )
+
+
+def test_load_dir_workers():
+    """Test that decoding files with threads produces identical results."""
+
+    for valid in [True, False]:
+        results = []
+        for workers, pool in [
+            (1, LoadPool.AUTO),
+            (4, LoadPool.THREAD),
+            (2, LoadPool.PROCESS),
+        ]:
+            options = LoadOptions(workers=workers, pool=pool)
+            variables = load_dir(
+                get_test_variables(valid)[0],
+                {},
+                loads=LoadedFiles(options=options),
+            )
+            loads = LoadedFiles([], {}, options)
+            data, success, _ = load_dir(
+                get_test_configs(valid)[0], {}, variables.data, loads
+            )
+            results.append((data, success, loads.files))
+
+        assert results[0] == results[1]
+        assert results[0] == results[2]
+        assert results[0][1] == valid
+
+
+def test_load_dir_processes():
+    """Test decoding files with processes."""
+
+    loads = LoadedFiles([], {}, LoadOptions(workers=2, pool=LoadPool.PROCESS))
+    assert not load_dir(get_test_variables(False)[0], {}, loads=loads).success
+    assert loads.files
+
+    # worker processes can be shared by loads (and are only started once)
+    with ProcessPool(2) as pool:
+        options = LoadOptions(workers=2, pool=LoadPool.PROCESS, processes=pool)
+        for _ in range(2):
+            assert load_dir(
+                get_test_variables()[0], {}, loads=LoadedFiles(options=options)
+            ).success
+        assert pool.starts == 1
+    assert pool.executor is None
+
+    # small trees aren't decoded with processes automatically
+    directories = list(directory_loads(get_test_configs()[0], {}))
+    assert not use_processes(directories)
+    assert use_processes(directories, LoadOptions(pool=LoadPool.PROCESS))
+
+
+def test_directory_loads_deep():
+    """
+    Test that walking a deep tree finds each directory's variables from its
+    parent's (instead of from the root of the tree).
+    """
+
+    def build(root: Path, depth: int) -> None:
+        """Create a tree of directories (two per level)."""
+
+        if depth:
+            for name in ["a", "b"]:
+                root.joinpath(name).mkdir()
+                build(root.joinpath(name), depth - 1)
+
+    variables = {"a": {"a": {"value": 1}}}
+
+    with TemporaryDirectory() as tmpdir:
+        build(Path(tmpdir), 10)
+
+        # walk the tree once first, so that it's cached by the file-system
+        # for both measurements (the best of a few runs is compared)
+        directories = list(directory_loads(tmpdir, variables))
+        durations = []
+        for _ in range(3):
+            start = time.perf_counter()
+            list(directory_loads(tmpdir, variables))
+            durations.append(time.perf_counter() - start)
+
+        # compute each directory's variables from the root of the tree
+        baselines = []
+        for _ in range(3):
+            start = time.perf_counter()
+            for root, _, _ in walk_with_excludes(tmpdir):
+                get_dict_by_path(
+                    get_path_list(os.path.abspath(tmpdir), root), variables
+                )
+            baselines.append(time.perf_counter() - start)
+
+    assert len(directories) == 2**11 - 1
+    for directory in directories:
+        assert list(directory.parts) == [
+            x
+            for x in os.path.relpath(directory.root, tmpdir).split(os.sep)
+            if x != "."
+        ]
+        if directory.parts == ("a", "a"):
+            assert directory.variables["value"] == 1
+        assert directory.variables[GLOBAL_KEY] is variables
+
+    # this is usually several times faster, the (generous) margin keeps busy
+    # machines from failing
+    assert min(durations) < 2 * max(min(baselines), 1e-3)
+
+
+def test_load_dir_traced_branches():
+    """
+    Test that snapshots aren't restored when traced accesses no longer match
+    the variables (rendering again could access different data).
+    """
+
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "data")
+        root.mkdir()
+        root.joinpath("x.yaml").write_text(
+            '---\nv: "{% if d.a %}{{d.b}}{% else %}{{d.c}}{% endif %}"\n',
+            "utf-8",
+        )
+
+        for sequence in [
+            # switch branches, then switch back with other values
+            [
+                ((1, 1, 1), "1"),
+                ((0, 1, 5), "5"),
+                ((1, 1, 1), "1"),
+                ((0, 1, 7), "7"),
+            ],
+            # (previously) accessed values that match another branch's
+            [((1, 1, 1), "1"), ((0, 1, 5), "5"), ((0, 1, 1), "1")],
+        ]:
+            options = LoadOptions(
+                ParseCache(str(Path(tmpdir, f"cache{len(sequence)}"))),
+                trace_variables=True,
+            )
+            for values, expected in sequence:
+                variables = {"d": dict(zip("abc", values))}
+                result = load_dir(
+                    root, {}, variables, LoadedFiles([], {}, options)
+                )
+                assert result.data == {"x": {"v": expected}}
+
+
+def test_load_dir_snapshots():
+    """Test that data for unchanged directories is restored from snapshots."""
+
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "data")
+        for name, content in [
+            ("a.yaml", "values: [1]"),
+            ("a/b.yaml", "values: [2]"),
+            ("a/b/c.yaml", "value: 3"),
+            ("d/e.yaml", "value: '{{global.value}}'"),
+        ]:
+            root.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+            root.joinpath(name).write_text(f"---\n{content}\n", "utf-8")
+
+        cache = ParseCache(str(Path(tmpdir, "cache")))
+
+        def load(existing: dict, variables: dict, cached: bool = True):
+            """Load the tree (with or without snapshots)."""
+
+            loads = LoadedFiles([], {}, LoadOptions(cache if cached else None))
+            result = load_dir(root, existing, variables, loads)
+            assert result.success
+            return result.data, loads.files
+
+        expected = load({}, {"value": 4}, False)
+        assert expected[0]["a"]["b"] == {"values": [2], "c": {"value": 3}}
+        assert expected[0]["d"]["e"]["value"] == "4"
+
+        # the second load restores the entire tree
+        assert load({}, {"value": 4}) == expected
+        hits = cache.hits
+        assert load({}, {"value": 4}) == expected
+        assert cache.hits == hits + 1
+
+        # changed files (and variables) are loaded again
+        root.joinpath("a/b/c.yaml").write_text("---\nvalue: 5\n", "utf-8")
+        data = load({}, {"value": 6})[0]
+        assert data["a"]["b"]["c"] == {"value": 5}
+        assert data["d"]["e"]["value"] == "6"
+
+        # directories with existing data are loaded (not restored)
+        existing = {"a": {"values": [2]}}
+        assert load(deepcopy(existing), {"value": 6}) == load(
+            deepcopy(existing), {"value": 6}, False
+        )
+
+        # when accesses are traced, only the variables files accessed matter
+        options = LoadOptions(cache, trace_variables=True)
+        for _ in range(3):
+            variables = {"value": 6, "other": {"a": 1}}
+            loads = LoadedFiles([], {}, options)
+            assert load_dir(root, {}, variables, loads).data == data
+        misses = cache.misses
+        variables = {"value": 6, "other": {"a": 2}}
+        loads = LoadedFiles([], {}, options)
+        assert load_dir(root, {}, variables, loads).data == data
+        assert cache.misses == misses
+
+        # (the tree is loaded again if they change)
+        variables = {"value": 7, "other": {"a": 2}}
+        data = load_dir(root, {}, variables, loads).data
+        assert get_dict_by_path(["d", "e"], data) == {"value": "7"}
+        assert cache.misses > misses
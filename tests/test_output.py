@@ -0,0 +1,100 @@
+"""
+datazen - Tests for the 'output' API.
+"""
+
+# built-in
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# third-party
+from pytest import mark
+
+# module under test
+from datazen.classes.output_stats import OutputStats
+from datazen.output import write_if_changed, write_output, write_stream
+
+
+def test_write_output():
+    """Test writing output files only when they change."""
+
+    stats = OutputStats()
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir, "out.txt")
+
+        assert write_output(str(path), "a\n", if_changed=True, stats=stats)
+        mtime = path.stat().st_mtime_ns
+        assert not write_output(str(path), "a\n", if_changed=True, stats=stats)
+        assert path.stat().st_mtime_ns == mtime
+
+        assert write_output(str(path), "b\n", if_changed=True, stats=stats)
+        assert path.read_text(encoding="utf-8") == "b\n"
+
+        # appending (or not checking) always writes
+        assert write_output(str(path), "b\n", "a", True, stats)
+        assert write_output(str(path), "b\nb\n", stats=stats)
+        assert path.read_text(encoding="utf-8") == "b\nb\n"
+
+        # no temporary files are left behind
+        assert os.listdir(tmpdir) == ["out.txt"]
+
+    assert stats.written == 4
+    assert stats.skipped == 1
+    assert stats.skipped_bytes == len("a" + os.linesep)
+    assert "1 unchanged output(s) skipped" in stats.describe()
+
+
+def test_write_if_changed():
+    """Test resolving whether or not a target writes only changed output."""
+
+    assert not write_if_changed({}, {})
+    assert write_if_changed({}, {"write_if_changed": True})
+    assert not write_if_changed(
+        {"write_if_changed": False}, {"write_if_changed": True}
+    )
+
+
+def test_write_stream():
+    """Test writing streamed output files (with a patch)."""
+
+    stats = OutputStats()
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir, "out.txt")
+        chunks = ["hash=????\n", "a", "b\n"]
+
+        assert write_stream(
+            str(path), iter(chunks), True, stats, lambda: (5, "abcd")
+        )
+        assert path.read_text(encoding="utf-8") == "hash=abcd\nab\n"
+
+        # the patched result is what's compared
+        assert not write_stream(
+            str(path), iter(chunks), True, stats, lambda: (5, "abcd")
+        )
+        assert write_stream(str(path), iter(chunks), True, stats)
+        assert path.read_text(encoding="utf-8") == "hash=????\nab\n"
+        assert os.listdir(tmpdir) == ["out.txt"]
+
+    assert stats.written == 2
+    assert stats.skipped == 1
+
+
+@mark.skipif(os.name == "nt", reason="no POSIX permissions")
+def test_write_stream_permissions():
+    """Test that written files get the permissions they're expected to."""
+
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir, "out.txt")
+        umask = os.umask(0o027)
+        try:
+            # new files are created with the process's umask
+            assert write_stream(str(path), ["a\n"])
+            assert path.stat().st_mode & 0o777 == 0o640
+            assert os.umask(0o027) == 0o027
+
+            # replaced files keep their permissions
+            path.chmod(0o600)
+            assert write_stream(str(path), ["b\n"])
+            assert path.stat().st_mode & 0o777 == 0o600
+        finally:
+            os.umask(umask)
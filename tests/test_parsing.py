@@ -5,13 +5,22 @@ datazen - Test functions in the 'parsing' module.
 # built-in
 import os
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 # third-party
 from pytest import raises
 from vcorelib.io import ARBITER
 
 # module under test
-from datazen.parsing import load
+from datazen.classes.parse_cache import ParseCache
+from datazen.enums import HashPolicy
+from datazen.parsing import (
+    CONTENT_HASHES,
+    data_md5,
+    hash_policy,
+    load,
+    set_file_hash,
+)
 
 # internal
 from .resources import get_resource
@@ -33,3 +42,137 @@ def test_load_assert():
 
     with raises(AssertionError):
         load(bad_load, {}, {}, require_success=True)
+
+
+def test_set_file_hash_policy():
+    """Test that the stat-based fast path is only used when requested."""
+
+    with TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "data.txt")
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("data")
+
+        hashes: dict = {}
+        assert set_file_hash(hashes, path)
+        assert not set_file_hash(hashes, path)
+        assert hashes[path]["stat"][1] == 4
+
+        # an unchanged file identity skips hashing entirely
+        hashes[path]["hash"] = "not-a-hash"
+        with hash_policy(HashPolicy.TRUST_STAT):
+            assert not set_file_hash(hashes, path)
+        assert set_file_hash(hashes, path, False)
+
+        # a changed identity is always hashed
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("new data")
+        assert set_file_hash(hashes, path, policy=HashPolicy.TRUST_STAT)
+        assert not set_file_hash(hashes, path, policy=HashPolicy.TRUST_STAT)
+
+
+def test_content_hashes_memoized():
+    """Test that file contents are only hashed once per file identity."""
+
+    with TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "data.txt")
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("data")
+
+        CONTENT_HASHES.clear()
+
+        # separate hash tables share the same content hashes
+        assert set_file_hash({}, path)
+        assert set_file_hash({}, path)
+        assert CONTENT_HASHES.misses == 1
+        assert CONTENT_HASHES.hits == 1
+
+        # a changed file is hashed again
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("more data")
+        assert set_file_hash({}, path)
+        assert CONTENT_HASHES.misses == 2
+        assert "2 file(s) hashed" in CONTENT_HASHES.describe()
+
+        CONTENT_HASHES.clear()
+        assert CONTENT_HASHES.hits == 0
+
+
+def test_load_parse_cache():
+    """Test that decoded data is re-used for identical inputs."""
+
+    with TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "data.yaml")
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("a: {{a}}\nb: 2\n")
+
+        cache = ParseCache(os.path.join(tdir, "parse"))
+        variables: dict = {"a": 1}
+        variables["global"] = variables
+
+        assert load(path, variables, {}, parse_cache=cache)[0] == {
+            "a": 1,
+            "b": 2,
+        }
+        assert load(path, variables, {}, parse_cache=cache)[0] == {
+            "a": 1,
+            "b": 2,
+        }
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # different variables replace the file's entry
+        variables["a"] = 3
+        assert load(path, variables, {}, parse_cache=cache)[0]["a"] == 3
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+        # a digest of the variables is used (instead of computing one)
+        assert load(
+            path, variables, {}, parse_cache=cache, variables_hash="a"
+        )[1]
+        assert (cache.hits, cache.misses) == (1, 3)
+        assert load(
+            path, variables, {}, parse_cache=cache, variables_hash="a"
+        )[1]
+        assert (cache.hits, cache.misses) == (2, 3)
+
+        # so does different content
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("a: {{a}}\nb: 4\n")
+        assert load(
+            path, variables, {}, parse_cache=cache, variables_hash="a"
+        )[0] == {"a": 3, "b": 4}
+        assert (cache.hits, cache.misses) == (2, 4)
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+        # extra decoding options bypass the cache
+        assert load(path, variables, {}, parse_cache=cache, maxsplit=1)[1]
+        assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_data_md5():
+    """Test digests of nested (and self-referential) data."""
+
+    data: dict = {"a": [1, 2, {"b": "c"}]}
+    digest = data_md5(data)
+    data["global"] = data
+    assert data_md5(data) != digest
+    assert data_md5(data) == data_md5(data)
+    assert data_md5({"a": "1"}) != data_md5({"a": 1})
+
+
+def test_load_parse_cache_unrendered():
+    """Test that data without template syntax doesn't depend on variables."""
+
+    with TemporaryDirectory() as tdir:
+        path = os.path.join(tdir, "data.yaml")
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("a: {b: 1}\n")
+
+        cache = ParseCache(os.path.join(tdir, "parse"))
+        assert load(path, {"a": 1}, {}, parse_cache=cache)[0] == {
+            "a": {"b": 1}
+        }
+        assert load(path, {"a": 2}, {}, parse_cache=cache)[0] == {
+            "a": {"b": 1}
+        }
+        assert (cache.hits, cache.misses) == (1, 1)
@@ -2,8 +2,14 @@
 datazen - Tests for the 'paths' API.
 """
 
+# built-in
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
 # module under test
 from datazen import paths
+from datazen.classes.listing_cache import ListingCache
 
 
 def test_unflatten_dict():
@@ -29,3 +35,43 @@ def test_format_resolve_delims():
     assert paths.format_resolve_delims("{a}", {"a": 5}) == "5"
     assert paths.format_resolve_delims("a{a}a", {"a": 5}) == "a5a"
     assert paths.format_resolve_delims("a{a.b.c}a", {"a.b.c": 5}) == "a5a"
+
+
+def test_get_dict_by_path():
+    """Test that looking up data by path doesn't modify it."""
+
+    data: dict = {"a": {"b": {"c": 1}}}
+    assert paths.get_dict_by_path(["a", "b"], data) == {"c": 1}
+    assert paths.get_dict_by_path(["a", "", "b"], data) == {"c": 1}
+    assert paths.get_dict_by_path(["a", "d", "e"], data) == {}
+    assert data == {"a": {"b": {"c": 1}}}
+
+
+def test_walk_with_excludes():
+    """Test that excluded directories are pruned from walks."""
+
+    with TemporaryDirectory() as tmpdir:
+        for name in ["a/b", "a/.git/objects", "build-1/c", "d"]:
+            Path(tmpdir, name).mkdir(parents=True)
+            Path(tmpdir, name, "data.yaml").write_text("---\n", "utf-8")
+        os.symlink(Path(tmpdir, "d"), Path(tmpdir, "e"))
+
+        def walk(**kwargs) -> list:
+            """Walk the tree and collect directories (relative to it)."""
+
+            return sorted(
+                os.path.relpath(root, tmpdir)
+                for root, _, _ in paths.walk_with_excludes(tmpdir, **kwargs)
+            )
+
+        # links are listed but not walked (like 'os.walk')
+        assert walk() == [".", "a", "a/b", "build-1", "build-1/c", "d"]
+        assert walk(excludes=[".git", "build-*"]) == [".", "a", "a/b", "d"]
+        assert walk(listings=ListingCache()) == walk()
+
+        # directories can be pruned by callers
+        result = []
+        for root, dirs, _ in paths.walk_with_excludes(tmpdir):
+            dirs[:] = [x for x in dirs if x != "a"]
+            result.append(root)
+        assert len(result) == 4
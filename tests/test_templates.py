@@ -2,8 +2,25 @@
 datazen - Tests for the 'templates' API.
 """
 
+# built-in
+import os
+from tempfile import TemporaryDirectory
+from typing import List
+
+# module under test
+from datazen.classes.template_cache import BytecodeCache
+from datazen.load import LoadedFiles, LoadOptions
+from datazen.templates import (
+    DYNAMIC,
+    environment,
+    find_references,
+    load,
+    template_dependencies,
+)
+
 # internal
 from . import ENV
+from .resources import get_resource
 
 
 def test_load_templates():
@@ -20,3 +37,72 @@ def test_load_templates():
         templates[key].render(configs)
 
     del configs["global"]
+
+
+def test_load_templates_bytecode():
+    """Test that compiled templates are stored in a bytecode cache."""
+
+    template_dir = get_resource("templates", True)
+    with TemporaryDirectory() as tdir:
+        bytecode_dir = os.path.join(tdir, "bytecode")
+        loads = LoadedFiles(
+            options=LoadOptions(bytecode_cache=BytecodeCache(bytecode_dir))
+        )
+
+        # templates are only compiled when they're used
+        templates = load([template_dir], loads)
+        assert templates and not os.path.isdir(bytecode_dir)
+        for key in templates:
+            assert templates[key].filename is not None
+        assert len(os.listdir(bytecode_dir)) == len(templates)
+
+        # templates can be loaded from bytecode
+        assert load([template_dir], loads).keys() == templates.keys()
+
+
+def test_find_references():
+    """Test finding the templates that a template references."""
+
+    env = environment()
+
+    assert find_references(
+        env.parse('{% extends __templates__["base"] %}{% include "a.j2" %}')
+    ) == [("key", "base"), ("name", "a.j2")]
+    assert find_references(
+        env.parse('{% include ["a.j2", "b.j2"] %}{{ __templates__.c }}')
+    ) == [("key", "c"), ("name", "a.j2"), ("name", "b.j2")]
+    assert find_references(env.parse("{% include name %}")) == [DYNAMIC]
+    assert find_references(env.parse("{{ __templates__[name] }}")) == [DYNAMIC]
+
+
+def test_template_dependencies():
+    """Test finding the transitive dependencies of a template."""
+
+    with TemporaryDirectory() as tmpdir:
+        sources = {
+            "a": '{% include "b.j2" %}',
+            "b": '{{ __templates__["c"].render() }}',
+            "c": "c",
+            "d": "d",
+            "e": "{% include name %}",
+        }
+        for name, source in sources.items():
+            with open(
+                os.path.join(tmpdir, f"{name}.j2"), "w", encoding="utf-8"
+            ) as stream:
+                stream.write(source)
+
+        templates = load([tmpdir])
+
+        def deps(key: str) -> List[str]:
+            """Get the names of a template's dependencies."""
+            return sorted(
+                os.path.basename(x)
+                for x in template_dependencies(
+                    templates, templates.source(key)
+                )
+            )
+
+        assert deps("a") == ["a.j2", "b.j2", "c.j2"]
+        assert deps("c") == ["c.j2"]
+        assert deps("e") == [f"{x}.j2" for x in sources]